@@ -0,0 +1,217 @@
+"""
+    Name: alerts.py
+    Author: William A Loring
+    Created: 10/18/2026
+    Purpose: Streaming threshold alerts on AirQualityReadings
+    A rule fires once when a field stays above its threshold for its
+    duration, and resolves once when it drops below its clear level
+
+    Pollutant fields of a reading are the feed's iaqi values, US AQI
+    sub-indices, not concentrations. Thresholds are AQI by default,
+    units = "concentration" gives them in the units of the
+    aqi_engine.BREAKPOINTS table instead, e.g. µg/m³ for PM.
+
+    Example rules in a daemon watchlist:
+        [[alert]]
+        name = "PM2.5 unhealthy for sensitive groups"
+        field = "pm25"
+        above = 100         # AQI
+        for = 7200          # seconds above before it fires
+        clear_below = 90    # hysteresis, defaults to above
+
+        [[alert]]
+        name = "PM2.5 over 35 µg/m³"
+        field = "pm25"
+        units = "concentration"
+        above = 35          # µg/m³, compared as AQI 99
+        for = 7200
+
+        [[alert]]
+        name = "Cheyenne AQI"
+        field = "aqi"
+        station = 9526      # only this station, default every station
+        above = 100
+"""
+
+import math
+import time
+import air_quality
+import aqi_engine
+
+# Fields a rule can watch, every numeric measured value of a reading
+FIELDS = tuple(
+    name for name in air_quality.AirQualityReading.__slots__
+    if name not in ("station", "sensor_location", "lat", "lng", "time",
+                    "dom_pol"))
+
+# Threshold units of a rule
+AQI = "aqi"
+CONCENTRATION = "concentration"
+
+# aqi_engine pollutant of each field a concentration rule can watch
+POLLUTANTS = {
+    "pm25": "pm25",
+    "pm10": "pm10",
+    "o3": "o3_8h",
+    "co": "co",
+    "so2": "so2",
+    "no2": "no2",
+}
+
+# Alert event states
+TRIGGERED = "triggered"
+RESOLVED = "resolved"
+
+
+class Rule:
+    """
+    field above threshold for duration seconds, at one or every station.
+    A concentration threshold is converted once to the AQI sub-index
+    the reading holds, above and clear_below are always AQI.
+    """
+
+    def __init__(self, name, field, above, duration=0, clear_below=None,
+                 station=None, units=AQI):
+        if field not in FIELDS:
+            raise ValueError(f"Unknown alert field: {field}")
+        if clear_below is not None and clear_below > above:
+            raise ValueError(
+                f"clear_below must not be above the threshold: {name}")
+        if units not in (AQI, CONCENTRATION):
+            raise ValueError(f"Unknown alert units: {units}")
+        self.name = name
+        self.field = field
+        self.units = units
+        # Thresholds as given, for the alert events
+        self.threshold = float(above)
+        self.clear_threshold = self.threshold if clear_below is None \
+            else float(clear_below)
+        self.above = self._aqi(self.threshold)
+        self.clear_below = self._aqi(self.clear_threshold)
+        self.duration = float(duration)
+        self.station = station
+
+# ---------------------- AQI --------------------------------------------- #
+    def _aqi(self, value):
+        """A threshold in the units of the rule as an AQI sub-index"""
+        if self.units == AQI:
+            return value
+        if self.field not in POLLUTANTS:
+            raise ValueError(
+                f"{self.field} has no concentration units: {self.name}")
+        aqi = float(aqi_engine.sub_index(POLLUTANTS[self.field], value))
+        if math.isnan(aqi):
+            raise ValueError(
+                f"{value} is outside the {self.field} AQI table: {self.name}")
+        return aqi
+
+
+# ---------------------- LOAD RULES -------------------------------------- #
+def load_rules(entries):
+    """Create Rules from the [[alert]] tables of a watchlist"""
+    return [
+        Rule(
+            name=entry.get("name") or f"{entry.get('field')} > "
+            f"{entry.get('above')}",
+            field=entry.get("field", ""),
+            above=entry["above"],
+            duration=entry.get("for", 0),
+            clear_below=entry.get("clear_below"),
+            station=entry.get("station"),
+            units=entry.get("units", AQI),
+        )
+        for entry in entries
+    ]
+
+
+class AlertEngine:
+    """
+    Rules indexed by (station, field), None is every station, so a
+    reading only visits the rules that can match it. Each rule keeps
+    three values per station: since when it has been above, whether it
+    has fired, and the time of the last reading seen.
+    """
+
+    def __init__(self, rules=()):
+        # (station, field): [Rule]
+        self._index = {}
+        # (id(rule), station): [above_since, active, last_time]
+        self._state = {}
+        for rule in rules:
+            self.add_rule(rule)
+
+# ---------------------- ADD RULE ---------------------------------------- #
+    def add_rule(self, rule):
+        self._index.setdefault((rule.station, rule.field), []).append(rule)
+
+# ---------------------- EVALUATE ---------------------------------------- #
+    def evaluate(self, reading):
+        """
+        Feed one reading to every rule that watches its station.
+        A repeat of an observation already seen is ignored, so polling
+        faster than a station updates neither delays nor repeats alerts.
+        Returns:
+            list: Alert event dictionaries, empty on most readings.
+        """
+        now = reading.time if reading.time is not None else time.time()
+        events = []
+        for field in FIELDS:
+            rules = self._index.get((reading.station, field), []) + \
+                self._index.get((None, field), [])
+            if not rules:
+                continue
+            value = getattr(reading, field)
+            if value is None or math.isnan(value):
+                # No data says nothing about the condition
+                continue
+            for rule in rules:
+                event = self._step(rule, reading.station, value, now)
+                if event is not None:
+                    events.append(event)
+        return events
+
+# ---------------------- STEP -------------------------------------------- #
+    def _step(self, rule, station, value, now):
+        """Advance one rule at one station, return an event or None"""
+        key = (id(rule), station)
+        state = self._state.get(key)
+        if state is None:
+            state = self._state[key] = [None, False, None]
+        above_since, active, last_time = state
+        if last_time is not None and now <= last_time:
+            return None
+        state[2] = now
+
+        if active:
+            if value < rule.clear_below:
+                state[0], state[1] = None, False
+                return self._event(RESOLVED, rule, station, value, now,
+                                   above_since)
+            return None
+
+        if value > rule.above:
+            if above_since is None:
+                above_since = state[0] = now
+            if now - above_since >= rule.duration:
+                state[1] = True
+                return self._event(TRIGGERED, rule, station, value, now,
+                                   above_since)
+        else:
+            state[0] = None
+        return None
+
+# ---------------------- EVENT ------------------------------------------- #
+    def _event(self, kind, rule, station, value, now, since):
+        return {
+            "event": "alert",
+            "state": kind,
+            "rule": rule.name,
+            "station": station,
+            "field": rule.field,
+            "value": value,
+            "above": rule.above,
+            "threshold": rule.threshold,
+            "units": rule.units,
+            "since": since,
+            "time": now,
+        }
@@ -0,0 +1,292 @@
+"""
+    Name: aqi_engine.py
+    Author: William A Loring
+    Created: 10/18/2026
+    Purpose: Compute US EPA AQI from raw pollutant concentrations
+    Vectorized over NumPy arrays with piecewise-linear interpolation
+"""
+
+import time
+# pip install numpy
+import numpy as np
+
+# AQI range of each category: Good, Moderate, Unhealthy for Sensitive
+# Groups, Unhealthy, Very Unhealthy, Hazardous
+AQI_LOW = np.array([0, 51, 101, 151, 201, 301], dtype=float)
+AQI_HIGH = np.array([50, 100, 150, 200, 300, 500], dtype=float)
+
+# EPA concentration breakpoints (May 2024 revision)
+# pollutant: (units, decimals kept, low breakpoints, high breakpoints)
+# NaN marks categories a pollutant does not define
+BREAKPOINTS = {
+    # 24 hour µg/m³
+    "pm25": ("µg/m³", 1,
+             [0.0, 9.1, 35.5, 55.5, 125.5, 225.5],
+             [9.0, 35.4, 55.4, 125.4, 225.4, 325.4]),
+    # 24 hour µg/m³
+    "pm10": ("µg/m³", 0,
+             [0, 55, 155, 255, 355, 425],
+             [54, 154, 254, 354, 424, 604]),
+    # 8 hour ppm, above 0.200 ppm the 1 hour value must be used
+    "o3_8h": ("ppm", 3,
+              [0.000, 0.055, 0.071, 0.086, 0.106, np.nan],
+              [0.054, 0.070, 0.085, 0.105, 0.200, np.nan]),
+    # 1 hour ppm, only defined from 0.125 ppm
+    "o3_1h": ("ppm", 3,
+              [np.nan, np.nan, 0.125, 0.165, 0.205, 0.405],
+              [np.nan, np.nan, 0.164, 0.204, 0.404, 0.604]),
+    # 8 hour ppm
+    "co": ("ppm", 1,
+           [0.0, 4.5, 9.5, 12.5, 15.5, 30.5],
+           [4.4, 9.4, 12.4, 15.4, 30.4, 50.4]),
+    # 1 hour ppb
+    "so2": ("ppb", 0,
+            [0, 36, 76, 186, 305, 605],
+            [35, 75, 185, 304, 604, 1004]),
+    # 1 hour ppb
+    "no2": ("ppb", 0,
+            [0, 54, 101, 361, 650, 1250],
+            [53, 100, 360, 649, 1249, 2049]),
+}
+
+# Pollutants in the order used for dominant pollutant codes
+POLLUTANTS = tuple(BREAKPOINTS)
+
+# Feed dominentpol name of each pollutant
+FEED_NAMES = {
+    "pm25": "pm25",
+    "pm10": "pm10",
+    "o3_8h": "o3",
+    "o3_1h": "o3",
+    "co": "co",
+    "so2": "so2",
+    "no2": "no2",
+}
+
+
+# ---------------------- SEARCH TABLE ------------------------------------ #
+def _search_table(high):
+    """
+    Return the high breakpoints with undefined leading categories as -inf
+    and undefined trailing categories as +inf, so the table stays sorted
+    for numpy.searchsorted and never selects an undefined category.
+    """
+    high = np.array(high, dtype=float)
+    defined = np.flatnonzero(~np.isnan(high))
+    search = high.copy()
+    search[:defined[0]] = -np.inf
+    search[defined[-1] + 1:] = np.inf
+    return search
+
+
+# ---------------------- TABLE ------------------------------------------- #
+def _table(decimals, low, high):
+    """
+    Precompute the arrays sub_index() needs for one pollutant:
+    (decimals, c_low, slope, search, lowest, highest)
+    """
+    low = np.array(low, dtype=float)
+    high = np.array(high, dtype=float)
+    slope = (AQI_HIGH - AQI_LOW) / (high - low)
+    # The top category is open ended only if the pollutant defines it,
+    # 8 hour ozone above 0.200 ppm is undefined rather than 500
+    return (decimals, low, slope, _search_table(high),
+            np.nanmin(low), high[-1])
+
+
+_TABLES = {
+    name: _table(decimals, low, high)
+    for name, (units, decimals, low, high) in BREAKPOINTS.items()
+}
+
+
+# ---------------------- TRUNCATE ---------------------------------------- #
+def truncate(values, decimals):
+    """Truncate concentrations to the precision EPA specifies"""
+    scale = 10.0 ** decimals
+    # The small epsilon keeps 9.1 from truncating to 9.0999...
+    return np.floor(values * scale + 1e-9) / scale
+
+
+# ---------------------- SUB INDEX --------------------------------------- #
+def sub_index(pollutant, concentrations):
+    """
+    Compute the AQI sub-index of one pollutant.
+    Args:
+        pollutant (str): A key of BREAKPOINTS.
+        concentrations (array_like): Concentrations in the units of
+            the BREAKPOINTS table, any shape, NaN for missing.
+    Returns:
+        numpy.ndarray: AQI values rounded to integers, NaN where the
+        concentration is missing, negative, or outside the table.
+        Values above the top breakpoint are reported as 500.
+    """
+    decimals, c_low, slope, search, lowest, highest = _TABLES[pollutant]
+    shape = np.shape(concentrations)
+    c = truncate(np.atleast_1d(np.asarray(concentrations, dtype=float)),
+                 decimals)
+
+    # Category of each concentration, piecewise-linear within it
+    category = np.searchsorted(search, c)
+    np.minimum(category, len(search) - 1, out=category)
+    aqi = np.round(slope[category] * (c - c_low[category])
+                   + AQI_LOW[category])
+
+    # Above the highest breakpoint the AQI is off the scale
+    aqi[c > highest] = 500.0
+    # Missing, negative, or below the first defined category,
+    # e.g. 1 hour ozone under 0.125 ppm
+    aqi[~(c >= lowest)] = np.nan
+    return aqi.reshape(shape)
+
+
+# ---------------------- CONCENTRATION ----------------------------------- #
+def concentration(pollutant, aqi):
+    """
+    Invert sub_index(): the concentration of one pollutant at an AQI.
+    Feed iaqi values are AQI, not concentrations, averaging them needs
+    the concentrations back.
+    Args:
+        pollutant (str): A key of BREAKPOINTS.
+        aqi (array_like): AQI values, any shape, NaN for missing.
+    Returns:
+        numpy.ndarray: Concentrations in the units of the BREAKPOINTS
+        table, NaN where the AQI is missing, negative, above 500 or in
+        a category the pollutant does not define.
+    """
+    decimals, c_low, slope, search, lowest, highest = _TABLES[pollutant]
+    shape = np.shape(aqi)
+    aqi = np.atleast_1d(np.asarray(aqi, dtype=float))
+
+    # AQI values are integers, 50.5 rounds into the next category
+    category = np.searchsorted(AQI_HIGH, aqi)
+    np.minimum(category, len(AQI_HIGH) - 1, out=category)
+    c = (aqi - AQI_LOW[category]) / slope[category] + c_low[category]
+    c[~((aqi >= 0) & (aqi <= AQI_HIGH[-1]))] = np.nan
+    return c.reshape(shape)
+
+
+# ---------------------- COMPUTE AQI ------------------------------------- #
+def compute_aqi(concentrations):
+    """
+    Compute the overall AQI and dominant pollutant for a batch of readings.
+    Args:
+        concentrations (dict): pollutant: array_like of concentrations.
+            Arrays must broadcast to one shape, pollutants that were
+            not measured can be left out.
+    Returns:
+        tuple: (aqi, dominant) arrays. aqi is NaN where no pollutant was
+        measured, dominant holds indexes into POLLUTANTS, -1 for none.
+    """
+    names = [name for name in POLLUTANTS if name in concentrations]
+    if not names:
+        raise ValueError("No known pollutant in concentrations")
+
+    indexes = np.stack(np.broadcast_arrays(
+        *[sub_index(name, concentrations[name]) for name in names]))
+    # -1 sorts below every real sub-index
+    filled = np.where(np.isnan(indexes), -1.0, indexes)
+    best = np.argmax(filled, axis=0)
+    aqi = np.take_along_axis(filled, best[np.newaxis], axis=0)[0]
+
+    codes = np.array([POLLUTANTS.index(name) for name in names])
+    dominant = np.where(aqi < 0, -1, codes[best])
+    aqi = np.where(aqi < 0, np.nan, aqi)
+    return aqi, dominant
+
+
+# ---------------------- DOMINANT NAMES ---------------------------------- #
+def dominant_names(dominant):
+    """Return feed style pollutant names for dominant codes, "" for none"""
+    names = np.array([FEED_NAMES[name] for name in POLLUTANTS] + [""])
+    return names[np.asarray(dominant)]
+
+
+# ---------------------- COMPUTE BATCH ----------------------------------- #
+def compute_batch(stations):
+    """
+    Compute the AQI for many stations at once.
+    Args:
+        stations (dict): station: {pollutant: array_like}, every array
+            covering the same time steps, e.g. a day of minute readings.
+    Returns:
+        dict: station: (aqi, dominant) arrays as from compute_aqi().
+    """
+    # Stations measuring the same pollutants over the same number of
+    # time steps are stacked into 2D arrays and computed in one call
+    groups = {}
+    for station, concentrations in stations.items():
+        arrays = {name: np.asarray(values, dtype=float)
+                  for name, values in concentrations.items()}
+        shape = np.broadcast_shapes(*[a.shape for a in arrays.values()])
+        key = (tuple(sorted(arrays)), shape)
+        groups.setdefault(key, []).append((station, arrays))
+
+    results = {}
+    for (names, shape), members in groups.items():
+        stacked = {
+            name: np.stack([np.broadcast_to(arrays[name], shape)
+                            for station, arrays in members])
+            for name in names
+        }
+        aqi, dominant = compute_aqi(stacked)
+        for row, (station, arrays) in enumerate(members):
+            results[station] = (aqi[row], dominant[row])
+    return results
+
+
+# ---------------------- CROSS CHECK ------------------------------------- #
+def cross_check(reading, concentrations):
+    """
+    Compare a feed reading with the AQI computed from raw concentrations.
+    Args:
+        reading (AirQualityReading): Reading parsed from the feed.
+        concentrations (dict): pollutant: concentration for the same time.
+    Returns:
+        tuple: (aqi, dominant, matches) with the computed AQI and feed
+        style dominant pollutant name, and True if both agree with
+        the feed.
+    """
+    aqi, dominant = compute_aqi(concentrations)
+    aqi = None if np.isnan(aqi) else int(aqi)
+    dominant = str(dominant_names(dominant)) or None
+    matches = aqi == reading.aqi and dominant == reading.dom_pol
+    return aqi, dominant, matches
+
+
+# ---------------------- BENCHMARK --------------------------------------- #
+def benchmark(stations=100, minutes=24 * 60, seed=0):
+    """
+    Time compute_batch() on a day of minute readings per station.
+    Returns the elapsed seconds.
+    """
+    rng = np.random.default_rng(seed)
+    data = {
+        station: {
+            "pm25": rng.gamma(2.0, 8.0, minutes),
+            "pm10": rng.gamma(2.0, 20.0, minutes),
+            "o3_8h": rng.gamma(3.0, 0.015, minutes),
+            "co": rng.gamma(2.0, 1.0, minutes),
+            "so2": rng.gamma(2.0, 10.0, minutes),
+            "no2": rng.gamma(2.0, 15.0, minutes),
+        }
+        for station in range(stations)
+    }
+    start = time.perf_counter()
+    compute_batch(data)
+    return time.perf_counter() - start
+
+
+def main():
+    stations = 100
+    minutes = 24 * 60
+    elapsed = benchmark(stations, minutes)
+    readings = stations * minutes
+    print(f" {readings:,} readings in {elapsed:.3f} s, "
+          f"{readings / elapsed:,.0f} readings per second")
+
+
+# If a standalone program, call the main function
+# Else, use as a module
+if __name__ == '__main__':
+    main()
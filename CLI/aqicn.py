@@ -0,0 +1,75 @@
+"""
+    Name: aqicn.py
+    Author: William A Loring
+    Created: 10/18/2026
+    Purpose: Non-interactive commands for the World Air Quality Project App
+    Run from this folder:
+        python -m aqicn daemon --watchlist sites.toml
+        python -m aqicn serve --port 8080
+        python -m aqicn region --bounds 40,-105,43,-101
+        python -m aqicn geocode locations.csv geocoded.csv
+"""
+
+import argparse
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="aqicn",
+        description="World Air Quality Project App commands")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    daemon = commands.add_parser(
+        "daemon", help="Poll a watchlist of locations on a schedule")
+    daemon.add_argument(
+        "--watchlist", required=True, help="TOML file of sites to poll")
+
+    serve = commands.add_parser(
+        "serve", help="Serve cached AQI over a local HTTP API")
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=8080)
+    serve.add_argument(
+        "--no-store", action="store_true",
+        help="Do not record fetched readings in the readings store")
+
+    region = commands.add_parser(
+        "region", help="Fetch every station in a bounding box")
+    region.add_argument(
+        "--bounds", required=True, help="lat1,lng1,lat2,lng2")
+    region.add_argument(
+        "--tile", type=float, default=5.0,
+        help="Largest tile in degrees, bigger boxes are split")
+    region.add_argument("--top", type=int, default=20,
+                        help="Number of worst stations to print")
+    region.add_argument("--out", help="Save the station table as CSV")
+
+    geocode = commands.add_parser(
+        "geocode", help="Geocode a CSV of locations, resumable")
+    geocode.add_argument("input", help="CSV with location columns")
+    geocode.add_argument("output", help="CSV written with lat, lng, address")
+    geocode.add_argument("--city-column", default="city")
+    geocode.add_argument("--state-column", default="state")
+    geocode.add_argument("--country-column", default="country")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "daemon":
+        import aqicn_daemon
+        aqicn_daemon.run_daemon(args.watchlist)
+    elif args.command == "serve":
+        import aqicn_server
+        aqicn_server.run_server(args.host, args.port, not args.no_store)
+    elif args.command == "region":
+        import map_bounds
+        map_bounds.run_region(args.bounds, args.tile, args.out, args.top)
+    elif args.command == "geocode":
+        import bulk_geocode
+        bulk_geocode.run_bulk_geocode(
+            args.input, args.output, args.city_column,
+            args.state_column, args.country_column)
+
+
+# If a standalone program, call the main function
+# Else, use as a module
+if __name__ == '__main__':
+    main()
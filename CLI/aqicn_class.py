@@ -5,60 +5,98 @@
     Purpose: World Air Quality Index class for AQICN API
 """
 
-# pip install requests
-import requests
-import api_key
+import asyncio
+import time
+from datetime import datetime
 import geocode_geopy
-import weather_utils
+import air_quality
+import forecast
+import nowcast
+import feed_cache
+import http_client
+import async_client
+import readings_store
+import rolling_stats
+import station_index
+import station_map
 
 # Set this to False to only display the final results
 IS_DEBUGGING = False
 
-# URL for World Air Quality Index
-AQICN_ENDPOINT = 'https://api.waqi.info/feed/geo:'
+
+# ------------------------ FETCH FEED ------------------------------------- #
+def fetch_feed(lat, lng):
+    """
+    Request the AQICN feed for a latitude, longitude.
+    Returns the JSON data as a Python dictionary,
+    or None if the API is unavailable.
+    """
+    # Use the shared keep-alive session with timeouts and retries
+    response = http_client.get_feed(lat, lng)
+
+    # Any status_code other than 200 means the API is unavailable
+    if (response.status_code != 200):
+        return None
+
+    # Convert JSON data into a Python dictionary with key value pairs
+    data = response.json()
+
+    # Used to debug process
+    if (IS_DEBUGGING == True):
+
+        # Display the status code
+        print(
+            f'\n Status code: {response.status_code} \n')
+
+        # Display the raw JSON data
+        print(' Raw API data:')
+        print(response.text)
+
+        # Display the Python dictionary
+        print('\nThe JSON data converted to a Python dictionary:')
+        print(data)
+
+    return data
 
 
 class AQICNClass:
     def __init__(self):
         self.WIDTH = 27
+        # Every fetched reading and forecast is kept for trend views
+        self.store = readings_store.ReadingsStore()
+        # 24 hour averages kept up to date in memory, shown with the
+        # current reading without querying the store
+        self.stats = rolling_stats.RollingStats.load()
 
 # ------------------------ GET LOCATION ----------------------------------- #
     def get_location(self):
         # Get location input from user
         try:
-            # Return lat, lng, and address from geopy Nominatum
-            lat, lng, self.address = geocode_geopy.geocode()
+            city = input("Enter city: ")
+            state = input("Enter state: ")
+            country = input("Enter country: ")
+
+            # A location seen before is fetched by its station idx,
+            # else geocoded and answered by a known station nearby
+            # with a fresh reading, else through the feed cache
+            self.address, data = station_map.STATION_MAP.fetch(
+                city, state, country, geocode_geopy.lookup,
+                fetch_feed, http_client.fetch_station_feed)
 
-            # Use the requests.get() function
-            # with the parameter of the url
-            response = requests.get(
-                AQICN_ENDPOINT + str(lat) + ";" + str(lng)
-                + "/?token=" + api_key.API_KEY
-            )
+            # A dictionary is returned for a successful connection
+            if data is not None:
 
-            # If the status_code is 200, successful connection and data
-            if (response.status_code == 200):
+                # Python dictionary of the JSON data
+                self.data = data
 
-                # Convert JSON data into a Python dictionary with key value pairs
-                self.data = response.json()
+                # Keep the reading and forecast history
+                reading = self.store.add_feed(data)
+                self.store.flush()
+                self.update_stats(reading)
+                station_index.STATIONS.save()
 
                 # Let user know the connection was successful
                 print("\n [+] The connection to AQICN was successful.")
-
-                # Used to debug process
-                if (IS_DEBUGGING == True):
-
-                    # Display the status code
-                    print(
-                        f'\n Status code: {response.status_code} \n')
-
-                    # Display the raw JSON data
-                    print(' Raw API data:')
-                    print(response.text)
-
-                    # Display the Python dictionary
-                    print('\nThe JSON data converted to a Python dictionary:')
-                    print(self.data)
             else:
                 print('[-] API unavailable. You may want to try again')
                 self.get_location()
@@ -67,131 +105,123 @@ class AQICNClass:
             print(e)
             self.get_location()
 
+# ------------------------ UPDATE STATS ---------------------------------- #
+    def update_stats(self, reading):
+        """
+        Add a reading to the rolling averages. A station not seen
+        before is primed once from the last day of stored readings.
+        """
+        if reading.station not in self.stats:
+            start = time.time() - self.stats.seconds
+            self.stats.extend(self.store.readings(reading.station, start=start))
+        if self.stats.add(reading):
+            self.stats.save()
+
 # ------------------------ GET AQI FORECAST ------------------------------ #
     def get_aqi_forecast(self):
-        WIDTH = 4
         # Get sensor location from the API response
         sensor_location = self.data.get(
             "data", {}).get(
             "city", {}).get("name", "N/A")
-        # Get the forecast data from the API response
-        forecast = self.data.get("data", {}).get(
-            "forecast", {}).get("daily", {})
+        # Columnar forecast aligned on day, NA where a pollutant
+        # has no forecast for that day
+        self.forecast = forecast.Forecast.from_feed(self.data)
 
-        # Extract o3 (ozone) and pm25 (particulate matter) forecast data
-        o3_slice = forecast.get("o3", [])
-        pm10_slice = forecast.get("pm10", [])
-        pm25_slice = forecast.get("pm25", [])
-        uvi_slice = forecast.get("uvi", [])
-
-        print(f'\n {self.address}')
-        print(f' {"Sensor Location:":15} {sensor_location}')
-        print("", "-"*70)
-        print(f" {'o3':>15} {'pm10':>5} {'pm25':>5} {'uvi':>4}")
-
-        # Iterate through list of dictionaries
-        # for x, y, z in map(None, o3_slice, pm25_slice, uvi_slice):
-        # for x, y, z in zip_longest(o3_slice, pm25_slice, uvi_slice, fillvalue="NA"):
-        # for x, y, z in zip(o3_slice, pm25_slice, uvi_slice):
-        #     print(
-        #         f'{x.get("day")}: {x.get("avg"):{WIDTH}} {y.get("avg"):{WIDTH}} {z.get("avg"):{WIDTH}} {weather_utils.uvi_to_string(z.get("avg"))}')
-        for o3, pm10, pm25, uvi in zip(o3_slice, pm10_slice, pm25_slice, uvi_slice):
-
-            day = o3.get('day', 'N/A')
-            o3 = o3.get('avg', 'N/A')
-            pm10 = pm10.get('avg', 'N/A')
-            pm25 = pm25.get('avg', 'N/A')
-            uvi = uvi.get('avg', 'N/A')
-
-            # For each day in the forecast, add a line with the
-            # date, o3, pm10, pm25 and uvi average
-            result = f"{day}: {o3:>4} {pm10:> 4} {pm25:>5} {uvi:>4}"
-            print(result)
+        print(forecast.format_forecast(
+            self.address, sensor_location, self.forecast), end="")
 
 # ------------------------ GET CURRENT AQI ------------------------------- #
     def get_aqi(self):
-        self.sensor_location = self.data.get("data").get("city").get("name")
-        self.aqi = self.data.get("data").get("aqi")
-        self.aqi_string = weather_utils.aqi_to_string(self.aqi)
-
-        # Ozone
-        if "o3" in self.data.get("data").get("iaqi"):
-            self.o3 = self.data.get("data").get("iaqi").get("o3").get("v")
-        else:
-            self.o3 = "NA"
-        # Fine particulates PM25
-        self.pm25 = self.data.get("data").get("iaqi").get("pm25").get("v")
-
-        # Coarse particulates PM10
-        if "pm10" in self.data.get("data").get("iaqi"):
-            self.pm10 = self.data.get("data").get("iaqi").get("pm10").get("v")
-        else:
-            self.pm10 = "NA"
-
-        # Carbon Monoxide
-        if "co" in self.data.get("data").get("iaqi"):
-            self.co = self.data.get("data").get("iaqi").get("co").get("v")
-        else:
-            self.co = "NA"
-
-        # Sulphur Dioxide
-        if "so2" in self.data.get("data").get("iaqi"):
-            self.so2 = self.data.get("data").get("iaqi").get("so2").get("v")
-        else:
-            self.so2 = "NA"
-
-        # Nitrogen Dioxide
-        if "no2" in self.data.get("data").get("iaqi"):
-            self.no2 = self.data.get("data").get("iaqi").get("no2").get("v")
-        else:
-            self.no2 = "NA"
-
-        # ------- Dominant pollutant
-        self.dom_pol = self.data.get("data").get("dominentpol")
-
-        # ------- UV Index
-        if "uvi" in self.data.get("data").get("forecast").get("daily"):
-            self.uvi = self.data.get("data").get("forecast").get(
-                "daily").get("uvi")[0].get("avg")
-            self.uvi_string = weather_utils.uvi_to_string(self.uvi)
-        else:
-            self.uvi = "NA"
-            self.uvi_string = "NA"
-
-        # Celsius temperature
-        temp = round(self.data.get("data").get("iaqi").get("t").get("v"), 1)
-        # Convert to fahrenheit
-        self.temperature = round(((temp * 9.0)/5.0) + 32, 2)
-
-        self.humidity = self.data.get("data").get("iaqi").get("h").get("v")
-
-        # Wind in kph
-        wind_speed_kph = self.data.get("data").get("iaqi").get("w").get("v")
-        # Convert to mph
-        self.wind_speed_mph = round(wind_speed_kph * .0621371, 1)
-
-        # Barometric pressure in mmHg
-        pressure = self.data.get("data").get("iaqi").get("p").get("v")
-        # Convert to mph
-        self.pressure = round(pressure * .02953, 2)
+        """Parse the current reading from the API data for display_aqi"""
+        self.reading = air_quality.AirQualityReading.from_feed(self.data)
+
+# ------------------------ FETCH MANY ------------------------------------ #
+    async def fetch_many(self, locations,
+                         concurrency=async_client.DEFAULT_CONCURRENCY,
+                         rate=async_client.DEFAULT_RATE, client=None):
+        """
+        Fetch the current AQI for many locations concurrently.
+        Results are yielded as each request finishes, not in input order.
+        Args:
+            locations (iterable): (lat, lng) pairs, geocode addresses
+                first with geocode_geopy.
+            concurrency (int): Maximum number of requests in flight.
+            rate (float): Maximum requests per second to the AQICN host.
+            client (AsyncClient): Open client to share between calls,
+                its limits replace concurrency and rate.
+        Yields:
+            tuple: (location, result) where result is an
+            AirQualityReading, or the exception that stopped the fetch.
+        Example:
+            async for location, result in aqicn.fetch_many(sites):
+                ...
+        """
+        if client is None:
+            async with async_client.AsyncClient(concurrency, rate) as client:
+                async for result in self.fetch_many(locations, client=client):
+                    yield result
+            return
+
+        async def fetch_one(location):
+            lat, lng = location
+            try:
+                # Fresh responses are shared with the interactive path
+                cached = feed_cache.FEED_CACHE.get(lat, lng)
+                if cached is not None and cached[1]:
+                    data = cached[0]
+                else:
+                    data = await client.fetch_feed(lat, lng)
+                    if data is None:
+                        raise ConnectionError("API unavailable")
+                    feed_cache.FEED_CACHE.put(lat, lng, data)
+                    station_index.STATIONS.add_feed(data)
+                # Stored in batches, flushed when the cycle ends
+                return location, self.store.add_feed(data)
+            except Exception as e:
+                return location, e
+
+        tasks = [asyncio.ensure_future(fetch_one(location))
+                 for location in locations]
+        try:
+            for task in asyncio.as_completed(tasks):
+                yield await task
+        finally:
+            # Stop outstanding requests if the caller stops early
+            for task in tasks:
+                task.cancel()
+            self.store.flush()
+            station_index.STATIONS.save()
+
+# ------------------------ GET AQI TREND --------------------------------- #
+    def get_aqi_trend(self, hours=24):
+        """
+        Print the stored readings of the current station for the
+        last number of hours, read from the store without an API call.
+        """
+        station = self.data.get("data", {}).get("idx")
+        start = time.time() - hours * 60 * 60
+        readings = self.store.readings(station, start=start)
+
+        na = air_quality.value_or_na
+        print(f'\n {self.address}')
+        print(f' {"Sensor Location:":15} '
+              f'{self.data.get("data", {}).get("city", {}).get("name", "N/A")}')
+        print("", "-"*70)
+        if not readings:
+            print(f" No readings stored for the last {hours} hours.")
+            return
+        print(f" {'Observed':>19} {'AQI':>5} {'PM25':>5} {'PM10':>5} {'O3':>5}")
+        for reading in readings:
+            observed = datetime.fromtimestamp(reading.time)
+            print(f" {observed:%m/%d/%Y %I:%M %p} {na(reading.aqi):>5} "
+                  f"{na(reading.pm25):>5} {na(reading.pm10):>5} "
+                  f"{na(reading.o3):>5}")
 
 # ------------------------ DISPLAY AQI ----------------------------------- #
     def display_aqi(self):
         """Print the data from dictionary created from the API data"""
-        result = f"\n {self.address}\n"
-        result += f" {'Sensor Location:':<15} {self.sensor_location}\n"
-        result += f"{'-'*70}\n"
-        result += f" {'AQI:':>27} {self.aqi} {self.aqi_string}\n"
-        result += f" {'Dominant Pollutant:':>27} {self.dom_pol}\n"
-        result += f" {'Ozone (O₃):':>27} {self.o3}\n"
-        result += f" {'Fine Particulates (PM25):':>27} {self.pm25}\n"
-        result += f" {'Coarse Particulates (PM10):':>27} {self.pm10}\n"
-        result += f" {'Carbon Monoxide (CO):':>27} {self.co}\n"
-        result += f" {'Sulfur Dioxide (SO₂):':>27} {self.so2}\n"
-        result += f" {'Nitrogen Dioxide (NO₂):':>27} {self.no2}\n"
-        result += f" {'UV Index:':>27} {self.uvi} {self.uvi_string}\n"
-        result += f" {'Temperature:':>27} {self.temperature}°F\n"
-        result += f" {'Humidity:':>27} {self.humidity}%\n"
-        result += f" {'Wind Speed:':>27} {self.wind_speed_mph} mph\n"
-        result += f" {'Pressure:':>27} {self.pressure} inHg\n"
-        print(result)
+        station = self.reading.station
+        print(air_quality.format_reading(
+            self.address, self.reading, self.stats.means(station),
+            nowcast.nowcast_batch(self.store, [station]).get(station)))
+
@@ -17,6 +17,7 @@ def menu():
     print(f" [1] Get current AQI")
     print(f" [2] Get AQI forecast")
     print(f" [3] Get new location")
+    print(f" [4] Get AQI trend")
     menu_choice = input(f" [Enter] to quit. Enter your choice: ")
     return menu_choice
 
@@ -54,6 +55,10 @@ def main():
         elif menu_choice == "3":
             clear_console()
             aqicn.get_location()
+        # Display the stored readings history, no API call
+        elif menu_choice == "4":
+            clear_console()
+            aqicn.get_aqi_trend()
 
 
 def clear_console():
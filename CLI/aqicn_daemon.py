@@ -0,0 +1,322 @@
+"""
+    Name: aqicn_daemon.py
+    Author: William A Loring
+    Created: 10/18/2026
+    Purpose: Headless daemon that polls a watchlist of locations
+    Run from this folder with: python -m aqicn daemon --watchlist sites.toml
+
+    Example sites.toml:
+        [daemon]
+        rate = 5            # requests per second, all sites together
+        concurrency = 10    # requests in flight
+        jitter = 0.1        # +/- fraction of each interval
+        sinks = ["stdout", "jsonl:readings.jsonl"]
+        alert_sinks = ["stdout", "webhook:http://127.0.0.1:9000/alerts"]
+
+        [[site]]
+        name = "Scottsbluff"
+        city = "Scottsbluff"
+        state = "NE"
+        country = "US"
+        interval = 600      # seconds
+
+        [[site]]
+        name = "Cheyenne"
+        lat = 41.18
+        lng = -104.78
+        interval = 900
+
+        [[alert]]           # see alerts.py for every option
+        field = "pm25"
+        above = 100         # thresholds are AQI sub-indices, like
+        for = 7200          # the iaqi values of the feed
+
+        [[alert]]
+        field = "pm25"
+        units = "concentration"
+        above = 35          # µg/m³
+        for = 7200
+"""
+
+import asyncio
+import heapq
+import random
+import time
+import tomllib
+# pip install geopy
+from geopy.exc import GeocoderServiceError
+import aqicn_class
+import alerts
+import async_client
+import geocode_geopy
+import forecast_diff
+import geocode_service
+import sinks
+
+# Defaults for the [daemon] table and for sites without an interval
+DEFAULT_INTERVAL = 15 * 60
+DEFAULT_RATE = 5
+DEFAULT_CONCURRENCY = 10
+DEFAULT_JITTER = 0.1
+DEFAULT_SINKS = ("stdout",)
+
+# Seconds before a site whose geocoding failed is tried again,
+# doubled on each failure up to the maximum
+GEOCODE_RETRY = 60
+GEOCODE_RETRY_MAX = 60 * 60
+
+
+class Site:
+    """One watchlist entry"""
+
+    def __init__(self, name, interval, lat=None, lng=None,
+                 city="", state="", country=""):
+        self.name = name
+        self.interval = interval
+        self.lat = lat
+        self.lng = lng
+        self.city = city
+        self.state = state
+        self.country = country
+        # Seconds until the next geocoding attempt after a failure
+        self.geocode_retry = GEOCODE_RETRY
+
+    @property
+    def location(self):
+        return (self.lat, self.lng)
+
+
+# ---------------------- LOAD WATCHLIST ---------------------------------- #
+def load_watchlist(path):
+    """
+    Read a TOML watchlist.
+    Returns:
+        tuple: (settings, sites, rules) with the [daemon] table as a
+        dictionary, a list of Site objects and a list of alert Rules.
+    """
+    with open(path, "rb") as file:
+        config = tomllib.load(file)
+
+    settings = config.get("daemon", {})
+    sites = []
+    for entry in config.get("site", []):
+        if "lat" not in entry and not any(
+                entry.get(part) for part in ("city", "state", "country")):
+            raise ValueError(
+                f"Site needs lat, lng or a city, state, country: {entry}")
+        sites.append(Site(
+            name=entry.get("name") or entry.get("city") or
+            f"{entry.get('lat')},{entry.get('lng')}",
+            interval=float(entry.get("interval", DEFAULT_INTERVAL)),
+            lat=entry.get("lat"),
+            lng=entry.get("lng"),
+            city=entry.get("city", ""),
+            state=entry.get("state", ""),
+            country=entry.get("country", ""),
+        ))
+    return settings, sites, alerts.load_rules(config.get("alert", []))
+
+
+class Daemon:
+    """
+    Polls every site on its own interval from one long-lived process.
+    A heap ordered by next due time is the scheduler, each site is
+    rescheduled with jitter so sites with the same interval spread out.
+    """
+
+    def __init__(self, sites, sink_list, rate=DEFAULT_RATE,
+                 concurrency=DEFAULT_CONCURRENCY, jitter=DEFAULT_JITTER,
+                 rules=(), alert_sinks=None):
+        self.sites = sites
+        self.sinks = sink_list
+        # Every reading is checked against the alert rules as it arrives
+        self.alerts = alerts.AlertEngine(rules)
+        self.alert_sinks = sink_list if alert_sinks is None else alert_sinks
+        self.rate = rate
+        self.concurrency = concurrency
+        self.jitter = jitter
+        self.aqicn = aqicn_class.AQICNClass()
+        # Forecast days that changed are written as their own records
+        self.unsubscribe = forecast_diff.FORECAST_CHANGES.subscribe(
+            self.emit_forecast)
+        # (due, sequence, site)
+        self._heap = []
+        self._sequence = 0
+
+# ---------------------- SCHEDULE ---------------------------------------- #
+    def schedule(self, site, due):
+        """Add a site to the scheduler heap"""
+        self._sequence += 1
+        heapq.heappush(self._heap, (due, self._sequence, site))
+
+# ---------------------- NEXT DUE ---------------------------------------- #
+    def next_due(self, site, now):
+        """Next poll time of a site, interval +/- jitter"""
+        spread = site.interval * self.jitter
+        return now + site.interval + random.uniform(-spread, spread)
+
+# ---------------------- GEOCODE SITE ------------------------------------ #
+    async def geocode_site(self, site):
+        """
+        Geocode a site given by address, through the geocode cache.
+        Failures are written to the sinks as error records.
+        Returns:
+            bool: True if the site has a location, False if the service
+            failed and it should be retried, None if it was not found.
+        """
+        if site.lat is not None:
+            return True
+        try:
+            site.lat, site.lng, address = await asyncio.to_thread(
+                geocode_geopy.lookup, site.city, site.state,
+                site.country, priority=geocode_service.BATCH)
+        except ValueError as e:
+            # Not found now means not found later, stop polling it
+            self.emit_error(site, f"Geocoding failed, site dropped: {e}")
+            return None
+        except GeocoderServiceError as e:
+            self.emit_error(
+                site, f"Geocoding failed, retry in {site.geocode_retry:.0f}"
+                f" s: {e}")
+            return False
+        print(f" [+] {site.name}: {address}")
+        return True
+
+# ---------------------- RETRY GEOCODE ----------------------------------- #
+    def retry_geocode(self, site, now):
+        """Schedule another geocoding attempt, backing off each time"""
+        self.schedule(site, now + site.geocode_retry)
+        site.geocode_retry = min(site.geocode_retry * 2, GEOCODE_RETRY_MAX)
+
+# ---------------------- POLL -------------------------------------------- #
+    async def poll(self, due_sites, client):
+        """Fetch every due site concurrently and write the results"""
+        by_location = {}
+        for site in due_sites:
+            by_location.setdefault(site.location, []).append(site)
+
+        async for location, result in self.aqicn.fetch_many(
+                by_location, client=client):
+            for site in by_location[location]:
+                self.emit(site, result)
+
+# ---------------------- EMIT -------------------------------------------- #
+    def emit(self, site, result):
+        """Write one fetch result to every sink"""
+        record = {"site": site.name, "fetched": time.time()}
+        if isinstance(result, Exception):
+            record["error"] = str(result)
+        else:
+            record.update(result.as_dict())
+        for sink in self.sinks:
+            sink.write(record)
+
+        if not isinstance(result, Exception):
+            for event in self.alerts.evaluate(result):
+                event["site"] = site.name
+                for sink in self.alert_sinks:
+                    sink.write(event)
+
+# ---------------------- EMIT ERROR -------------------------------------- #
+    def emit_error(self, site, message):
+        """Write an error record that is not a fetch result"""
+        record = {"site": site.name, "fetched": time.time(),
+                  "error": message}
+        for sink in self.sinks:
+            sink.write(record)
+
+# ---------------------- EMIT FORECAST ----------------------------------- #
+    def emit_forecast(self, changes):
+        """Write every new or changed forecast day to every sink"""
+        fetched = time.time()
+        for change in changes:
+            record = {"event": "forecast", "fetched": fetched}
+            record.update(change.as_dict())
+            for sink in self.sinks:
+                sink.write(record)
+
+# ---------------------- RUN --------------------------------------------- #
+    async def run(self, cycles=None):
+        """
+        Poll forever, or for a number of scheduler wake ups.
+        All requests share one client, so the rate limit is global.
+        """
+        for site in self.sites:
+            located = await self.geocode_site(site)
+            now = time.time()
+            if located:
+                # Spread the first polls over the first jitter window
+                self.schedule(
+                    site, now + random.uniform(0, site.interval * self.jitter))
+            elif located is False:
+                self.retry_geocode(site, now)
+
+        async with async_client.AsyncClient(
+                self.concurrency, self.rate) as client:
+            while self._heap and cycles != 0:
+                due, sequence, site = self._heap[0]
+                delay = due - time.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+
+                # Everything due by now is fetched in one batch
+                now = time.time()
+                due_sites = []
+                while self._heap and self._heap[0][0] <= now:
+                    site = heapq.heappop(self._heap)[2]
+                    # A site whose geocoding failed is tried again
+                    located = await self.geocode_site(site)
+                    if located:
+                        due_sites.append(site)
+                    elif located is False:
+                        self.retry_geocode(site, time.time())
+
+                if due_sites:
+                    await self.poll(due_sites, client)
+
+                now = time.time()
+                for site in due_sites:
+                    self.schedule(site, self.next_due(site, now))
+                if cycles is not None:
+                    cycles -= 1
+
+# ---------------------- CLOSE ------------------------------------------- #
+    def close(self):
+        """Flush the readings store and close the sinks"""
+        self.aqicn.store.close()
+        self.unsubscribe()
+        for sink in self.sinks + [
+                sink for sink in self.alert_sinks if sink not in self.sinks]:
+            sink.close()
+
+
+# ---------------------- RUN DAEMON -------------------------------------- #
+def run_daemon(watchlist):
+    """Load a watchlist and poll it until interrupted"""
+    settings, sites, rules = load_watchlist(watchlist)
+    if not sites:
+        print("[-] The watchlist has no [[site]] entries.")
+        return
+
+    sink_list = [sinks.create_sink(spec)
+                 for spec in settings.get("sinks", DEFAULT_SINKS)]
+    alert_sinks = None
+    if "alert_sinks" in settings:
+        alert_sinks = [sinks.create_sink(spec)
+                       for spec in settings["alert_sinks"]]
+
+    daemon = Daemon(
+        sites,
+        sink_list,
+        rate=settings.get("rate", DEFAULT_RATE),
+        concurrency=settings.get("concurrency", DEFAULT_CONCURRENCY),
+        jitter=settings.get("jitter", DEFAULT_JITTER),
+        rules=rules,
+        alert_sinks=alert_sinks,
+    )
+    try:
+        asyncio.run(daemon.run())
+    except KeyboardInterrupt:
+        print("\n [+] Daemon stopped.")
+    finally:
+        daemon.close()
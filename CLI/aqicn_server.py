@@ -0,0 +1,333 @@
+"""
+    Name: aqicn_server.py
+    Author: William A Loring
+    Created: 10/18/2026
+    Purpose: Local HTTP API serving cached AQI to internal dashboards
+    Run from this folder with: python -m aqicn serve --port 8080
+
+    GET /aqi?city=&state=&country=       current reading
+    GET /forecast?city=&state=&country=  daily forecast
+    GET /metrics                         request, upstream and geocode
+                                         queue metrics
+"""
+
+import asyncio
+import hashlib
+import json
+import time
+from collections import deque
+from email.utils import formatdate, parsedate_to_datetime
+# pip install aiohttp
+from aiohttp import web
+# pip install geopy
+from geopy.exc import GeocoderServiceError
+# pip install numpy
+import numpy as np
+import air_quality
+import async_client
+import feed_cache
+import forecast
+import geocode_cache
+import geocode_geopy
+import geocode_service
+import readings_store
+import station_index
+import station_map
+import weather_utils
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8080
+
+# Latency samples kept per endpoint for percentiles
+LATENCY_SAMPLES = 1000
+
+# Seconds clients may reuse a response before revalidating
+MAX_AGE = 60
+
+# Seconds between flushes of buffered readings to the store, a crash
+# loses at most this long of readings on a quiet server
+FLUSH_INTERVAL = 30
+
+
+class Metrics:
+    """Request counters and a sliding window of latencies per endpoint"""
+
+    def __init__(self):
+        self.started = time.time()
+        self.requests = {}
+        self.not_modified = 0
+        self.upstream_calls = 0
+        self.deduplicated = 0
+        self.cache_hits = 0
+        self._latency = {}
+
+# ---------------------- RECORD ------------------------------------------ #
+    def record(self, endpoint, seconds):
+        """Count a request and remember its latency"""
+        self.requests[endpoint] = self.requests.get(endpoint, 0) + 1
+        samples = self._latency.get(endpoint)
+        if samples is None:
+            samples = self._latency[endpoint] = deque(maxlen=LATENCY_SAMPLES)
+        samples.append(seconds)
+
+# ---------------------- SNAPSHOT ---------------------------------------- #
+    def snapshot(self):
+        """Return the metrics as a dictionary for /metrics"""
+        latency = {}
+        for endpoint, samples in self._latency.items():
+            p50, p95, p99 = np.percentile(
+                np.fromiter(samples, float), [50, 95, 99]) * 1000
+            latency[endpoint] = {
+                "p50_ms": round(p50, 3),
+                "p95_ms": round(p95, 3),
+                "p99_ms": round(p99, 3),
+            }
+        return {
+            "uptime_s": round(time.time() - self.started, 1),
+            "requests": self.requests,
+            "not_modified": self.not_modified,
+            "cache_hits": self.cache_hits,
+            "deduplicated": self.deduplicated,
+            "upstream_calls": self.upstream_calls,
+            "latency": latency,
+        }
+
+
+class AQICNServer:
+    """
+    aiohttp application backed by the shared geocode and feed caches.
+    Requests for a location already being fetched await the same task,
+    so a burst of dashboard refreshes turns into one upstream call.
+    """
+
+    def __init__(self, concurrency=async_client.DEFAULT_CONCURRENCY,
+                 rate=async_client.DEFAULT_RATE, store=None):
+        self.concurrency = concurrency
+        self.rate = rate
+        self.store = store
+        self.metrics = Metrics()
+        self.client = None
+        self._flusher = None
+        # location key: asyncio.Task resolving to (address, data)
+        self._in_flight = {}
+
+        self.app = web.Application(middlewares=[self.timing])
+        self.app.router.add_get("/aqi", self.aqi)
+        self.app.router.add_get("/forecast", self.forecast)
+        self.app.router.add_get("/metrics", self.get_metrics)
+        self.app.on_startup.append(self.start_client)
+        self.app.on_cleanup.append(self.stop_client)
+
+# ---------------------- CLIENT ------------------------------------------ #
+    async def start_client(self, app):
+        self.client = async_client.AsyncClient(self.concurrency, self.rate)
+        await self.client.__aenter__()
+        if self.store is not None:
+            self._flusher = asyncio.ensure_future(self.flush_store())
+
+    async def stop_client(self, app):
+        if self._flusher is not None:
+            self._flusher.cancel()
+        await self.client.__aexit__(None, None, None)
+        station_index.STATIONS.save()
+        if self.store is not None:
+            self.store.close()
+
+# ---------------------- FLUSH STORE ------------------------------------- #
+    async def flush_store(self):
+        """Write buffered readings every FLUSH_INTERVAL seconds"""
+        while True:
+            await asyncio.sleep(FLUSH_INTERVAL)
+            try:
+                self.store.flush()
+            except Exception as e:
+                # Keep the rows buffered and try again next interval
+                print(f"[-] Could not flush the readings store: {e}")
+
+# ---------------------- TIMING ------------------------------------------ #
+    @web.middleware
+    async def timing(self, request, handler):
+        """Record the latency of every request"""
+        start = time.perf_counter()
+        try:
+            return await handler(request)
+        finally:
+            self.metrics.record(
+                request.path, time.perf_counter() - start)
+
+# ---------------------- LOCATION ---------------------------------------- #
+    async def location(self, request):
+        """
+        Return (address, data) for the city, state, country query.
+        Raises:
+            web.HTTPBadRequest: If no location field was given.
+            web.HTTPNotFound: If the location could not be geocoded.
+            web.HTTPServiceUnavailable: If the geocoding service failed.
+            web.HTTPBadGateway: If the AQICN API is unavailable.
+        """
+        city = request.query.get("city", "").strip()
+        state = request.query.get("state", "").strip()
+        country = request.query.get("country", "").strip()
+        if not any([city, state, country]):
+            raise web.HTTPBadRequest(
+                text="Please enter at least one location field.")
+
+        key = geocode_cache.location_key(city, state, country)
+        task = self._in_flight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(
+                self.resolve(city, state, country))
+            self._in_flight[key] = task
+            task.add_done_callback(
+                lambda done: self._in_flight.pop(key, None))
+        else:
+            self.metrics.deduplicated += 1
+        # shield: one client disconnecting must not cancel the others
+        return await asyncio.shield(task)
+
+# ---------------------- RESOLVE ----------------------------------------- #
+    async def resolve(self, city, state, country):
+        """Geocode and fetch one location through the shared caches"""
+        # A location seen before is fetched by its station idx
+        mapped = station_map.STATION_MAP.get(city, state, country)
+        if mapped is not None:
+            idx, address = mapped
+            data = station_index.STATIONS.fresh(idx)
+            if data is not None:
+                self.metrics.cache_hits += 1
+                return address, data
+            self.metrics.upstream_calls += 1
+            data = await self.client.fetch_station_feed(idx)
+            if data is not None and data.get("status") == "ok":
+                self.remember(data)
+                return address, data
+            # The station is gone or unavailable, resolve it again
+
+        try:
+            lat, lng, address = await asyncio.to_thread(
+                geocode_geopy.lookup, city, state, country)
+        except ValueError as e:
+            raise web.HTTPNotFound(text=str(e))
+        except GeocoderServiceError as e:
+            # Nominatim timed out or is down, every request waiting on
+            # this location gets the same clear answer
+            raise web.HTTPServiceUnavailable(
+                text=f"Geocoding service unavailable. Please try again. {e}")
+
+        cached = feed_cache.FEED_CACHE.get(lat, lng)
+        if cached is not None and cached[1]:
+            self.metrics.cache_hits += 1
+            return address, cached[0]
+
+        self.metrics.upstream_calls += 1
+        data = await self.client.fetch_feed(lat, lng)
+        if data is None:
+            if cached is not None:
+                # Serve the stale response rather than fail
+                return address, cached[0]
+            raise web.HTTPBadGateway(
+                text="API unavailable. Please try again.")
+        feed_cache.FEED_CACHE.put(lat, lng, data)
+        self.remember(data)
+        station_map.STATION_MAP.set(city, state, country, address, data)
+        return address, data
+
+# ---------------------- REMEMBER ---------------------------------------- #
+    def remember(self, data):
+        """Record a fetched feed in the station index and the store"""
+        station_index.STATIONS.add_feed(data)
+        if self.store is not None:
+            self.store.add_feed(data)
+
+# ---------------------- RESPOND ----------------------------------------- #
+    def respond(self, request, payload, modified):
+        """
+        Return a JSON response with ETag and Last-Modified headers,
+        or 304 Not Modified if the client already has it.
+        """
+        body = json.dumps(payload, default=str, sort_keys=True).encode()
+        etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+        headers = {
+            "ETag": etag,
+            "Cache-Control": f"max-age={MAX_AGE}",
+        }
+        if modified is not None:
+            headers["Last-Modified"] = formatdate(modified, usegmt=True)
+
+        if_none_match = request.headers.get("If-None-Match")
+        if_modified_since = request.headers.get("If-Modified-Since")
+        if if_none_match is not None:
+            not_modified = etag in [
+                tag.strip() for tag in if_none_match.split(",")
+            ] or if_none_match.strip() == "*"
+        elif if_modified_since is not None and modified is not None:
+            try:
+                since = parsedate_to_datetime(if_modified_since).timestamp()
+                not_modified = int(modified) <= since
+            except (TypeError, ValueError):
+                not_modified = False
+        else:
+            not_modified = False
+
+        if not_modified:
+            self.metrics.not_modified += 1
+            return web.Response(status=304, headers=headers)
+        return web.Response(
+            body=body, headers=headers, content_type="application/json")
+
+# ---------------------- AQI --------------------------------------------- #
+    async def aqi(self, request):
+        """GET /aqi, the current reading of a location"""
+        address, data = await self.location(request)
+        reading = air_quality.AirQualityReading.from_feed(data)
+        payload = reading.as_dict()
+        payload.update({
+            "address": address,
+            "aqi_string": reading.aqi_string,
+            "uvi_string": reading.uvi_string,
+            "temperature_f": reading.temperature_f,
+            "wind_speed_mph": reading.wind_speed_mph,
+            "pressure_inhg": reading.pressure_inhg,
+        })
+        return self.respond(request, payload, reading.time)
+
+# ---------------------- FORECAST ---------------------------------------- #
+    async def forecast(self, request):
+        """GET /forecast, the daily forecast of a location"""
+        address, data = await self.location(request)
+        daily = forecast.Forecast.from_feed(data)
+        payload = {
+            "address": address,
+            "sensor_location": data.get("data", {}).get(
+                "city", {}).get("name"),
+            "days": [str(day) for day in daily.days],
+            "pollutants": {
+                pollutant: {
+                    stat: [None if np.isnan(value) else float(value)
+                           for value in daily.column(pollutant, stat)]
+                    for stat in forecast.STATS
+                }
+                for pollutant in daily.avg
+            },
+        }
+        if "uvi" in daily.avg:
+            payload["uvi_strings"] = list(weather_utils.category_labels(
+                weather_utils.uvi_categories(daily.column("uvi")),
+                weather_utils.UVI_LABELS))
+        return self.respond(
+            request, payload, feed_cache.observed_time(data))
+
+# ---------------------- METRICS ----------------------------------------- #
+    async def get_metrics(self, request):
+        """GET /metrics"""
+        snapshot = self.metrics.snapshot()
+        snapshot["geocode"] = geocode_service.SERVICE.metrics()
+        return web.json_response(snapshot)
+
+
+# ---------------------- RUN SERVER -------------------------------------- #
+def run_server(host=DEFAULT_HOST, port=DEFAULT_PORT, store=True):
+    """Serve the API until interrupted"""
+    server = AQICNServer(
+        store=readings_store.ReadingsStore() if store else None)
+    web.run_app(server.app, host=host, port=port)
@@ -0,0 +1,152 @@
+"""
+    Name: async_client.py
+    Author: William A Loring
+    Created: 10/18/2026
+    Purpose: asyncio HTTP client for fetching many AQICN feeds at once
+    Uses the same timeouts and backoff as http_client
+"""
+
+import asyncio
+import time
+from urllib.parse import urlsplit
+# pip install aiohttp
+import aiohttp
+import api_key
+import http_client
+
+# Maximum number of requests in flight at once
+DEFAULT_CONCURRENCY = 20
+
+# Maximum requests per second sent to any one host
+DEFAULT_RATE = 20
+
+
+class RateLimiter:
+    """
+    Async token bucket, allows rate requests per second
+    with bursts of up to burst requests.
+    """
+
+    def __init__(self, rate, burst=None):
+        self.rate = rate
+        self.burst = burst or max(1, int(rate))
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+# ---------------------- ACQUIRE ----------------------------------------- #
+    async def acquire(self):
+        """Wait until a token is available, then take it"""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(
+                    self.burst,
+                    self.tokens + (now - self.updated) * self.rate
+                )
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class AsyncClient:
+    """
+    aiohttp session with a concurrency limit and per host rate limiting.
+    Use as an async context manager:
+        async with AsyncClient() as client:
+            data = await client.fetch_feed(lat, lng)
+    """
+
+    def __init__(self, concurrency=DEFAULT_CONCURRENCY, rate=DEFAULT_RATE):
+        self.concurrency = concurrency
+        self.rate = rate
+        self._semaphore = asyncio.Semaphore(concurrency)
+        # host: RateLimiter
+        self._limiters = {}
+        self._session = None
+
+    async def __aenter__(self):
+        connect, read = http_client.TIMEOUT
+        self._session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(
+                limit=self.concurrency,
+                limit_per_host=http_client.POOL_MAXSIZE
+            ),
+            timeout=aiohttp.ClientTimeout(connect=connect, sock_read=read)
+        )
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self._session.close()
+        self._session = None
+
+# ---------------------- LIMITER ----------------------------------------- #
+    def _limiter(self, url):
+        """Return the rate limiter for the host of url"""
+        host = urlsplit(url).netloc
+        limiter = self._limiters.get(host)
+        if limiter is None:
+            limiter = self._limiters[host] = RateLimiter(self.rate)
+        return limiter
+
+# ---------------------- GET JSON ---------------------------------------- #
+    async def get_json(self, url, params=None,
+                       retries=http_client.MAX_RETRIES):
+        """
+        GET a url and return the parsed JSON, or None if the API
+        answered with an error status after all retries.
+        Raises:
+            aiohttp.ClientError: If every attempt failed to connect.
+        """
+        limiter = self._limiter(url)
+        attempt = 0
+        while True:
+            async with self._semaphore:
+                await limiter.acquire()
+                try:
+                    async with self._session.get(
+                            url, params=params) as response:
+                        status = response.status
+                        retry_after = response.headers.get("Retry-After")
+                        if status == 200:
+                            return await response.json(content_type=None)
+                except (aiohttp.ClientConnectionError,
+                        asyncio.TimeoutError):
+                    if attempt >= retries:
+                        raise
+                    status, retry_after = None, None
+
+            if status is not None and (
+                    status not in http_client.RETRY_STATUS
+                    or attempt >= retries):
+                return None
+            # Back off outside the semaphore so other requests can run
+            await asyncio.sleep(
+                http_client.backoff_delay(attempt, retry_after))
+            attempt += 1
+
+# ---------------------- FETCH FEED -------------------------------------- #
+    async def fetch_feed(self, lat, lng):
+        """
+        Request the AQICN feed for a latitude, longitude.
+        Returns the JSON data as a Python dictionary,
+        or None if the API is unavailable.
+        """
+        return await self.get_json(
+            http_client.feed_url(lat, lng),
+            params={"token": api_key.API_KEY}
+        )
+
+# ---------------------- FETCH STATION FEED ------------------------------ #
+    async def fetch_station_feed(self, idx):
+        """
+        Request the AQICN feed of a station by its idx.
+        Returns the JSON data as a Python dictionary,
+        or None if the API is unavailable.
+        """
+        return await self.get_json(
+            http_client.station_url(idx),
+            params={"token": api_key.API_KEY}
+        )
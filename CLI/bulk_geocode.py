@@ -0,0 +1,140 @@
+"""
+    Name: bulk_geocode.py
+    Author: William A Loring
+    Created: 10/18/2026
+    Purpose: Geocode a CSV of locations, resumable after a crash
+    Run from this folder with:
+        python -m aqicn geocode locations.csv geocoded.csv
+    Each row goes through the geocode cache, the offline gazetteer and
+    the rate limited Nominatim service. Rows are written as they are
+    geocoded, a checkpoint next to the output records how far it got.
+"""
+
+import csv
+import json
+import os
+import time
+# pip install geopy
+from geopy.exc import GeocoderServiceError
+import geocode_geopy
+import geocode_service
+
+# Columns added to every row
+OUTPUT_FIELDS = ("lat", "lng", "address", "error")
+
+# Save the checkpoint after this many rows
+CHECKPOINT_EVERY = 50
+
+
+# ---------------------- CHECKPOINT -------------------------------------- #
+def checkpoint_path(output_path):
+    return output_path + ".checkpoint"
+
+
+def load_checkpoint(path):
+    """Return (rows done, output bytes) from a checkpoint, or (0, 0)"""
+    try:
+        with open(path, encoding="utf-8") as file:
+            saved = json.load(file)
+        return int(saved["rows"]), int(saved["offset"])
+    except (OSError, ValueError, KeyError):
+        return 0, 0
+
+
+def save_checkpoint(path, rows, offset):
+    """Write the checkpoint atomically, a crash leaves the old one"""
+    temp = path + ".tmp"
+    with open(temp, "w", encoding="utf-8") as file:
+        json.dump({"rows": rows, "offset": offset}, file)
+    os.replace(temp, path)
+
+
+# ---------------------- BULK GEOCODE ------------------------------------ #
+def bulk_geocode(input_path, output_path, city_column="city",
+                 state_column="state", country_column="country",
+                 priority=geocode_service.BATCH):
+    """
+    Stream input_path to output_path with lat, lng, address and error
+    columns added. Rows not found get an error, the run stops if the
+    geocoding service fails so a later run resumes at that row.
+    Returns:
+        tuple: (rows geocoded, rows not found) by this run.
+    Raises:
+        GeocoderServiceError: If Nominatim is unavailable.
+        ValueError: If the location columns are missing.
+    """
+    checkpoint = checkpoint_path(output_path)
+    done, offset = load_checkpoint(checkpoint)
+    if done and not os.path.exists(output_path):
+        done = offset = 0
+
+    with open(input_path, newline="", encoding="utf-8-sig") as source:
+        reader = csv.DictReader(source)
+        fields = reader.fieldnames or []
+        columns = [city_column, state_column, country_column]
+        if not any(column in fields for column in columns):
+            raise ValueError(
+                f"{input_path} has none of the columns {columns}")
+
+        mode = "r+" if done else "w"
+        with open(output_path, mode, newline="", encoding="utf-8") as output:
+            # Drop anything written after the last checkpoint
+            output.seek(offset)
+            output.truncate()
+            writer = csv.DictWriter(
+                output, fieldnames=fields + list(OUTPUT_FIELDS),
+                extrasaction="ignore")
+            if not done:
+                writer.writeheader()
+
+            geocoded = not_found = 0
+            started = time.time()
+            try:
+                for number, row in enumerate(reader):
+                    if number < done:
+                        continue
+                    city, state, country = (
+                        (row.get(column) or "").strip() for column in columns)
+                    try:
+                        if not any([city, state, country]):
+                            raise ValueError("No location fields")
+                        row["lat"], row["lng"], row["address"] = \
+                            geocode_geopy.lookup(
+                                city, state, country, priority=priority)
+                        geocoded += 1
+                    except ValueError as e:
+                        row["error"] = str(e)
+                        not_found += 1
+                    writer.writerow(row)
+                    done = number + 1
+
+                    if done % CHECKPOINT_EVERY == 0:
+                        output.flush()
+                        os.fsync(output.fileno())
+                        save_checkpoint(checkpoint, done, output.tell())
+                        rate = (geocoded + not_found) / (time.time() - started)
+                        print(f" [+] {done} rows, {rate:.1f} rows/s")
+            finally:
+                output.flush()
+                os.fsync(output.fileno())
+                save_checkpoint(checkpoint, done, output.tell())
+    return geocoded, not_found
+
+
+# ---------------------- RUN BULK GEOCODE -------------------------------- #
+def run_bulk_geocode(input_path, output_path, city_column="city",
+                     state_column="state", country_column="country"):
+    """Geocode a CSV, printing progress and how to resume on failure"""
+    try:
+        geocoded, not_found = bulk_geocode(
+            input_path, output_path, city_column, state_column,
+            country_column)
+    except GeocoderServiceError as e:
+        print(f"[-] Geocoding service unavailable: {e}")
+        print("[-] Run the same command again to resume.")
+        return
+    except KeyboardInterrupt:
+        print("\n[-] Stopped. Run the same command again to resume.")
+        return
+    os.remove(checkpoint_path(output_path))
+    print(f" [+] {geocoded} geocoded, {not_found} not found: {output_path}")
@@ -0,0 +1,179 @@
+"""
+    Name: feed_cache.py
+    Author: William A Loring
+    Created: 10/18/2026
+    Purpose: Short lived in-memory cache for WAQI feed responses
+    Keyed by latitude, longitude rounded to a grid so nearby
+    queries share one entry
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+# Grid size in degrees, 0.01 is roughly 1 km
+DEFAULT_GRID = 0.01
+
+# Stations publish a new reading about once an hour
+DEFAULT_REFRESH_INTERVAL = 60 * 60
+
+# A response is always fresh for at least this many seconds
+DEFAULT_MIN_TTL = 5 * 60
+
+# Past its freshness window, a response may still be served for this
+# many seconds while a background fetch refreshes it
+DEFAULT_STALE_WINDOW = 60 * 60
+
+# Maximum number of grid cells held in memory
+DEFAULT_MAX_ENTRIES = 512
+
+
+# ---------------------- GRID KEY ---------------------------------------- #
+def grid_key(lat, lng, grid=DEFAULT_GRID):
+    """Round a latitude, longitude pair to the nearest grid cell"""
+    return (round(float(lat) / grid), round(float(lng) / grid))
+
+
+# ---------------------- OBSERVED TIME ----------------------------------- #
+def observed_time(data):
+    """
+    Return the station observation time of a feed response
+    as a Unix timestamp, or None if the feed does not have one.
+    """
+    feed_time = (data or {}).get("data", {}).get("time", {})
+    iso = feed_time.get("iso")
+    if not iso:
+        return None
+    try:
+        return datetime.fromisoformat(iso).timestamp()
+    except ValueError:
+        return None
+
+
+class FeedCache:
+    """
+    LRU cache of WAQI feed responses with stale-while-revalidate.
+    fetch(lat, lng) is the only method the front ends need.
+    """
+
+    def __init__(self, grid=DEFAULT_GRID, max_entries=DEFAULT_MAX_ENTRIES,
+                 refresh_interval=DEFAULT_REFRESH_INTERVAL,
+                 min_ttl=DEFAULT_MIN_TTL,
+                 stale_window=DEFAULT_STALE_WINDOW):
+        self.grid = grid
+        self.max_entries = max_entries
+        self.refresh_interval = refresh_interval
+        self.min_ttl = min_ttl
+        self.stale_window = stale_window
+
+        # key: (fresh_until, stale_until, data)
+        self._entries = OrderedDict()
+        # Keys with a background revalidation running
+        self._revalidating = set()
+        self._lock = threading.Lock()
+
+# ---------------------- FRESH UNTIL ------------------------------------- #
+    def fresh_until(self, data, fetched):
+        """
+        A station reading is fresh until the next expected observation,
+        but never less than min_ttl after it was fetched.
+        """
+        observed = observed_time(data)
+        if observed is None:
+            next_reading = fetched + self.refresh_interval
+        else:
+            next_reading = min(
+                observed + self.refresh_interval,
+                fetched + self.refresh_interval
+            )
+        return max(next_reading, fetched + self.min_ttl)
+
+# ---------------------- GET --------------------------------------------- #
+    def get(self, lat, lng):
+        """
+        Return (data, is_fresh) for the grid cell of lat, lng,
+        or None if nothing usable is cached.
+        """
+        key = grid_key(lat, lng, self.grid)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            fresh_until, stale_until, data = entry
+            if now >= stale_until:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return data, now < fresh_until
+
+# ---------------------- PUT --------------------------------------------- #
+    def put(self, lat, lng, data):
+        """Store a successful feed response for the grid cell of lat, lng"""
+        if not data or data.get("status") != "ok":
+            return
+        key = grid_key(lat, lng, self.grid)
+        now = time.time()
+        fresh_until = self.fresh_until(data, now)
+        with self._lock:
+            self._entries[key] = (
+                fresh_until, fresh_until + self.stale_window, data)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+# ---------------------- FETCH ------------------------------------------- #
+    def fetch(self, lat, lng, fetch_feed):
+        """
+        Return the feed for lat, lng.
+        Args:
+            lat (float): Latitude.
+            lng (float): Longitude.
+            fetch_feed (callable): fetch_feed(lat, lng) returns the parsed
+                feed dictionary, or None if the API was unavailable.
+        Returns:
+            dict: The feed response, or None if it could not be fetched.
+        """
+        cached = self.get(lat, lng)
+        if cached is not None:
+            data, is_fresh = cached
+            if not is_fresh:
+                self._revalidate(lat, lng, fetch_feed)
+            return data
+
+        data = fetch_feed(lat, lng)
+        self.put(lat, lng, data)
+        return data
+
+# ---------------------- REVALIDATE -------------------------------------- #
+    def _revalidate(self, lat, lng, fetch_feed):
+        """Refresh a stale entry on a background thread"""
+        key = grid_key(lat, lng, self.grid)
+        with self._lock:
+            if key in self._revalidating:
+                return
+            self._revalidating.add(key)
+
+        def worker():
+            try:
+                self.put(lat, lng, fetch_feed(lat, lng))
+            except Exception:
+                # Keep serving the stale response, the next request
+                # past stale_until will fetch in the foreground
+                pass
+            finally:
+                with self._lock:
+                    self._revalidating.discard(key)
+
+        threading.Thread(target=worker, daemon=True).start()
+
+# ---------------------- CLEAR ------------------------------------------- #
+    def clear(self):
+        """Remove every cached response"""
+        with self._lock:
+            self._entries.clear()
+
+
+# Shared cache used by the CLI, Tkinter and PySide6 front ends
+FEED_CACHE = FeedCache()
@@ -0,0 +1,142 @@
+"""
+    Name: forecast.py
+    Author: William A Loring
+    Created: 10/18/2026
+    Purpose: Columnar AQI forecast aligned on day
+    One date index plus NumPy avg, min, max arrays per pollutant
+"""
+
+# pip install numpy
+import numpy as np
+
+# Pollutants in the forecast section of the feed, in display order
+FORECAST_POLLUTANTS = ("o3", "pm10", "pm25", "uvi")
+
+# Statistics reported for each forecast day
+STATS = ("avg", "min", "max")
+
+
+class Forecast:
+    """
+    Daily forecast for one station.
+    days is a sorted datetime64[D] array, every statistic array has the
+    same length and is aligned on days with NaN where a pollutant has
+    no forecast for that day.
+    """
+
+    __slots__ = ("days", "avg", "min", "max")
+
+    def __init__(self, days, avg, min, max):
+        self.days = days
+        # pollutant: float array aligned on days
+        self.avg = avg
+        self.min = min
+        self.max = max
+
+    def __len__(self):
+        return len(self.days)
+
+# ---------------------- FROM FEED --------------------------------------- #
+    @classmethod
+    def from_feed(cls, data):
+        """
+        Build the forecast from an AQICN feed dictionary.
+        Accepts the whole response or just its "data" section.
+        """
+        data = data.get("data", data)
+        daily = (data.get("forecast") or {}).get("daily") or {}
+
+        # Union of every day any pollutant has a forecast for
+        entries = {name: daily.get(name) or [] for name in daily}
+        day_strings = [entry.get("day") for values in entries.values()
+                       for entry in values if entry.get("day")]
+        days = np.unique(np.array(day_strings, dtype="datetime64[D]"))
+
+        columns = {stat: {} for stat in STATS}
+        for name, values in entries.items():
+            values = [entry for entry in values if entry.get("day")]
+            index = np.searchsorted(
+                days,
+                np.array([entry["day"] for entry in values],
+                         dtype="datetime64[D]")
+            )
+            for stat in STATS:
+                column = np.full(len(days), np.nan)
+                column[index] = [_number(entry.get(stat))
+                                 for entry in values]
+                columns[stat][name] = column
+
+        return cls(days, columns["avg"], columns["min"], columns["max"])
+
+# ---------------------- COLUMN ------------------------------------------ #
+    def column(self, pollutant, stat="avg"):
+        """Return the stat array for pollutant, all NaN if not forecast"""
+        values = getattr(self, stat).get(pollutant)
+        if values is None:
+            return np.full(len(self.days), np.nan)
+        return values
+
+# ---------------------- WORST DAY --------------------------------------- #
+    def worst_day(self, pollutant, stat="max"):
+        """Return the day with the highest stat for pollutant, or None"""
+        values = self.column(pollutant, stat)
+        if np.isnan(values).all():
+            return None
+        return self.days[np.nanargmax(values)]
+
+# ---------------------- EXCEEDANCE DAYS --------------------------------- #
+    def exceedance_days(self, pollutant, threshold, stat="max"):
+        """Return the days where stat for pollutant is above threshold"""
+        values = self.column(pollutant, stat)
+        # NaN compares False, days without a forecast never exceed
+        return self.days[values > threshold]
+
+
+# ---------------------- NUMBER ------------------------------------------ #
+def _number(value):
+    """Return value as a float, NaN if it is missing"""
+    if isinstance(value, (int, float)):
+        return float(value)
+    return np.nan
+
+
+# ---------------------- ALIGN ------------------------------------------- #
+def align(forecasts, pollutant, stat="avg"):
+    """
+    Align many stations' forecasts for one pollutant on a shared day index.
+    Returns:
+        tuple: (days, matrix) where matrix has one row per forecast and
+        one column per day, NaN where a station has no forecast.
+    """
+    if not forecasts:
+        return np.array([], dtype="datetime64[D]"), np.empty((0, 0))
+    days = np.unique(np.concatenate([f.days for f in forecasts]))
+    matrix = np.full((len(forecasts), len(days)), np.nan)
+    for row, f in enumerate(forecasts):
+        matrix[row, np.searchsorted(days, f.days)] = f.column(pollutant, stat)
+    return days, matrix
+
+
+# ---------------------- FORMAT FORECAST --------------------------------- #
+def format_forecast(address, sensor_location, forecast):
+    """Return the display text for a Forecast"""
+    result = f"\n {address}\n"
+    result += f" {'Sensor Location:':<15} {sensor_location}\n"
+    result += f"{'-'*70}\n"
+    result += f" {'o3':>15} {'pm10':>5} {'pm25':>5} {'uvi':>4}\n"
+
+    columns = [forecast.column(name) for name in FORECAST_POLLUTANTS]
+    for row, day in enumerate(forecast.days):
+        o3, pm10, pm25, uvi = [_format(values[row]) for values in columns]
+        # For each day in the forecast, add a line with the
+        # date, o3, pm10, pm25 and uvi average
+        result += f"{day}: {o3:>4} {pm10:>5} {pm25:>5} {uvi:>4}\n"
+    return result
+
+
+# ---------------------- FORMAT ------------------------------------------ #
+def _format(value):
+    """Format a forecast value for display, NA if it is missing"""
+    if np.isnan(value):
+        return "NA"
+    return f"{value:g}"
@@ -0,0 +1,317 @@
+"""
+    Name: gazetteer.py
+    Author: William A Loring
+    Created: 10/18/2026
+    Purpose: Offline geocoding from a GeoNames cities file
+    Build the index once, from this folder:
+        python gazetteer.py cities15000.txt admin1CodesASCII.txt countryInfo.txt
+    Files from https://download.geonames.org/export/dump/
+"""
+
+import difflib
+import json
+import mmap
+import os
+import sys
+import threading
+import unicodedata
+
+GAZETTEER_INDEX = "gazetteer.idx"
+GAZETTEER_ALIASES = "gazetteer.json"
+
+# Fuzzy matches must be at least this similar, 0 to 1
+FUZZY_CUTOFF = 0.85
+
+# GeoNames cities file columns
+NAME, ASCII_NAME, LATITUDE, LONGITUDE = 1, 2, 4, 5
+COUNTRY_CODE, ADMIN1_CODE, POPULATION = 8, 10, 14
+
+
+# ---------------------- NORMALIZE --------------------------------------- #
+def normalize(text):
+    """Casefold, strip accents and collapse whitespace for matching"""
+    text = unicodedata.normalize("NFKD", str(text or ""))
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    return " ".join(text.casefold().replace("|", " ").split())
+
+
+# ---------------------- BUILD ------------------------------------------- #
+def build(cities_path, admin1_path=None, country_path=None,
+          index_path=GAZETTEER_INDEX, aliases_path=GAZETTEER_ALIASES):
+    """
+    Build the sorted index file and the alias file.
+    Each index line is: name|admin1|cc, lat, lng, population, and the
+    display name, state and country, separated by tabs.
+    The alias file maps state and country names to their codes.
+    """
+    admin1_names = {}
+    if admin1_path:
+        with open(admin1_path, encoding="utf-8") as file:
+            for line in file:
+                fields = line.rstrip("\n").split("\t")
+                if len(fields) >= 2:
+                    admin1_names[fields[0]] = fields[1]
+
+    country_names = {}
+    if country_path:
+        with open(country_path, encoding="utf-8") as file:
+            for line in file:
+                if line.startswith("#"):
+                    continue
+                fields = line.rstrip("\n").split("\t")
+                if len(fields) >= 5:
+                    country_names[fields[0]] = fields[4]
+
+    lines = set()
+    with open(cities_path, encoding="utf-8") as file:
+        for line in file:
+            fields = line.rstrip("\n").split("\t")
+            if len(fields) <= POPULATION:
+                continue
+            cc = fields[COUNTRY_CODE]
+            admin1 = fields[ADMIN1_CODE]
+            display = "\t".join([
+                fields[LATITUDE], fields[LONGITUDE],
+                fields[POPULATION] or "0", fields[NAME],
+                admin1_names.get(f"{cc}.{admin1}", admin1),
+                country_names.get(cc, cc),
+            ])
+            # The ASCII name lets "Zurich" find "Zürich"
+            for name in {normalize(fields[NAME]),
+                         normalize(fields[ASCII_NAME])}:
+                if name:
+                    key = f"{name}|{normalize(admin1)}|{normalize(cc)}"
+                    lines.add(f"{key}\t{display}\n")
+
+    # Sorted by UTF-8 bytes, the order the binary search compares in
+    encoded = sorted(line.encode("utf-8") for line in lines)
+    with open(index_path, "wb") as file:
+        file.writelines(encoded)
+
+    states = {}
+    for code, name in admin1_names.items():
+        cc, _, admin1 = code.partition(".")
+        states[f"{normalize(name)}|{normalize(cc)}"] = normalize(admin1)
+    countries = {normalize(name): normalize(cc)
+                 for cc, name in country_names.items()}
+    with open(aliases_path, "w", encoding="utf-8") as file:
+        json.dump({"states": states, "countries": countries}, file)
+    return len(encoded)
+
+
+class Gazetteer:
+    """
+    Read only, memory-mapped view of an index built by build().
+    Lookups binary search the file without loading it into memory.
+    """
+
+    def __init__(self, index_path=GAZETTEER_INDEX,
+                 aliases_path=GAZETTEER_ALIASES):
+        self.index_path = index_path
+        self.aliases_path = aliases_path
+        self._mmap = None
+        self._states = {}
+        self._countries = {}
+        # Sorted unique names per country and of every country,
+        # built once when the index is opened
+        self._names = {}
+        self._all_names = []
+        self._lock = threading.Lock()
+
+    @property
+    def available(self):
+        """True if an index has been built"""
+        return self._open() is not None
+
+# ---------------------- OPEN -------------------------------------------- #
+    def _open(self):
+        """Map the index file on first use, None if it does not exist"""
+        if self._mmap is not None:
+            return self._mmap
+        with self._lock:
+            if self._mmap is None:
+                if not os.path.exists(self.index_path) \
+                        or os.path.getsize(self.index_path) == 0:
+                    return None
+                with open(self.index_path, "rb") as file:
+                    data = mmap.mmap(
+                        file.fileno(), 0, access=mmap.ACCESS_READ)
+                try:
+                    with open(self.aliases_path, encoding="utf-8") as file:
+                        aliases = json.load(file)
+                    self._states = aliases.get("states", {})
+                    self._countries = aliases.get("countries", {})
+                except (OSError, ValueError):
+                    pass
+                self._load_names(data)
+                # Published last, other threads only see a loaded index
+                self._mmap = data
+        return self._mmap
+
+# ---------------------- LOAD NAMES -------------------------------------- #
+    def _load_names(self, data):
+        """Collect the fuzzy match candidates from the mapped index"""
+        names = {}
+        for line in iter(data.readline, b""):
+            key = line.decode("utf-8").split("\t", 1)[0]
+            name, _, cc = key.split("|")
+            names.setdefault(cc, set()).add(name)
+        data.seek(0)
+        self._names = {cc: sorted(found) for cc, found in names.items()}
+        self._all_names = sorted(set().union(*names.values()))
+
+# ---------------------- LINE AT ----------------------------------------- #
+    def _line_at(self, position):
+        """Return (start, end) of the line containing a byte position"""
+        data = self._mmap
+        start = data.rfind(b"\n", 0, position) + 1
+        end = data.find(b"\n", position)
+        return start, len(data) if end == -1 else end + 1
+
+# ---------------------- SCAN -------------------------------------------- #
+    def _scan(self, prefix):
+        """Yield every index line starting with prefix, in key order"""
+        data = self._open()
+        if data is None:
+            return
+        prefix = prefix.encode("utf-8")
+
+        # Binary search for the first line >= prefix
+        low, high = 0, len(data)
+        while low < high:
+            middle = (low + high) // 2
+            start, end = self._line_at(middle)
+            if data[start:end] < prefix:
+                low = end
+            else:
+                high = start
+        position = low
+        while position < len(data):
+            start, end = self._line_at(position)
+            line = data[start:end]
+            if not line.startswith(prefix):
+                return
+            yield line.decode("utf-8")
+            position = end
+
+# ---------------------- CODES ------------------------------------------- #
+    def _codes(self, state, country):
+        """Translate state and country names to admin1 and country codes"""
+        cc = normalize(country)
+        cc = self._countries.get(cc, cc)
+        admin1 = normalize(state)
+        if cc:
+            admin1 = self._states.get(f"{admin1}|{cc}", admin1)
+        return admin1, cc
+
+# ---------------------- MATCHES ----------------------------------------- #
+    def matches(self, city, state="", country=""):
+        """
+        Exact name matches, most populated first.
+        State and country are optional, names or codes.
+        Returns:
+            list: (latitude, longitude, address) tuples.
+        """
+        name = normalize(city)
+        if not name or self._open() is None:
+            return []
+        admin1, cc = self._codes(state, country)
+        rows = []
+        for line in self._scan(f"{name}|"):
+            key, lat, lng, population, city_name, state_name, \
+                country_name = line.rstrip("\n").split("\t")
+            _, line_admin1, line_cc = key.split("|")
+            if cc and cc != line_cc:
+                continue
+            if admin1 and admin1 not in (line_admin1, normalize(state_name)):
+                continue
+            address = ", ".join(
+                part for part in (city_name, state_name, country_name)
+                if part)
+            rows.append((int(population), (float(lat), float(lng), address)))
+        rows.sort(key=lambda row: row[0], reverse=True)
+        # Names also indexed by ASCII name may appear twice
+        return list(dict.fromkeys(location for _, location in rows))
+
+# ---------------------- LOOKUP ------------------------------------------ #
+    def lookup(self, city, state="", country=""):
+        """
+        Return (latitude, longitude, address) of the best exact match,
+        then of the closest fuzzy match, or None on a miss.
+        """
+        found = self.matches(city, state, country)
+        if not found and (state or country):
+            # Typos only within the given country, to avoid surprises
+            for name in self.fuzzy(city, country):
+                found = self.matches(name, state, country)
+                if found:
+                    break
+        return found[0] if found else None
+
+# ---------------------- PREFIX ------------------------------------------ #
+    def prefix(self, text, limit=10):
+        """Up to limit display names of cities starting with text"""
+        text = normalize(text)
+        if not text:
+            return []
+        names = []
+        for line in self._scan(text):
+            fields = line.rstrip("\n").split("\t")
+            names.append(", ".join(
+                part for part in (fields[4], fields[5], fields[6]) if part))
+            if len(names) == limit:
+                break
+        return names
+
+# ---------------------- PLACES ------------------------------------------ #
+    def places(self):
+        """Yield (latitude, longitude, address) of every indexed place"""
+        seen = set()
+        for line in self._scan(""):
+            fields = line.rstrip("\n").split("\t")
+            place = (float(fields[1]), float(fields[2]), ", ".join(
+                part for part in (fields[4], fields[5], fields[6]) if part))
+            # Names also indexed by ASCII name appear twice
+            if place not in seen:
+                seen.add(place)
+                yield place
+
+# ---------------------- FUZZY ------------------------------------------- #
+    def fuzzy(self, city, country="", limit=3, cutoff=FUZZY_CUTOFF):
+        """Normalized names closest to city, optionally in one country"""
+        if self._open() is None:
+            return []
+        cc = self._codes("", country)[1]
+        if cc:
+            candidates = self._names.get(cc, [])
+        else:
+            candidates = self._all_names
+        return difflib.get_close_matches(
+            normalize(city), candidates, limit, cutoff)
+
+# ---------------------- CLOSE ------------------------------------------- #
+    def close(self):
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+            self._names = {}
+            self._all_names = []
+
+
+def main():
+    if len(sys.argv) < 2:
+        print("usage: python gazetteer.py cities.txt "
+              "[admin1CodesASCII.txt] [countryInfo.txt]")
+        return
+    count = build(*sys.argv[1:4])
+    print(f" [+] {count} names written to {GAZETTEER_INDEX}")
+
+
+# Shared gazetteer, lookups return None until an index is built
+GAZETTEER = Gazetteer()
+
+
+# If a standalone program, call the main function
+# Else, use as a module
+if __name__ == '__main__':
+    main()
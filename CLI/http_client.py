@@ -0,0 +1,144 @@
+"""
+    Name: http_client.py
+    Author: William A Loring
+    Created: 10/18/2026
+    Purpose: Shared keep-alive HTTP session for the AQICN API
+    Pooled connections, explicit timeouts, and jittered
+    exponential backoff on 429 and 5xx responses
+"""
+
+import random
+import threading
+import time
+# pip install requests
+import requests
+from requests.adapters import HTTPAdapter
+import api_key
+
+# Base URL for World Air Quality Index
+AQICN_BASE_URL = "https://api.waqi.info"
+
+# Number of host pools and connections kept alive per host
+POOL_CONNECTIONS = 4
+POOL_MAXSIZE = 10
+
+# (connect, read) timeouts in seconds
+TIMEOUT = (3.05, 10)
+
+# Retry budget for 429 and 5xx responses and connection errors
+MAX_RETRIES = 3
+RETRY_STATUS = (429, 500, 502, 503, 504)
+BACKOFF_BASE = 0.5
+BACKOFF_MAX = 8
+
+_session = None
+_session_lock = threading.Lock()
+
+
+# ---------------------- SESSION ----------------------------------------- #
+def session():
+    """Return the shared requests.Session, created on first use"""
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = requests.Session()
+            # Retries are handled by get() so the backoff can be jittered
+            adapter = HTTPAdapter(
+                pool_connections=POOL_CONNECTIONS,
+                pool_maxsize=POOL_MAXSIZE,
+                pool_block=True,
+                max_retries=0
+            )
+            _session.mount("https://", adapter)
+            _session.mount("http://", adapter)
+        return _session
+
+
+# ---------------------- BACKOFF DELAY ----------------------------------- #
+def backoff_delay(attempt, retry_after=None):
+    """
+    Full jitter exponential backoff: a random delay between 0 and
+    BACKOFF_BASE * 2 ** attempt, capped at BACKOFF_MAX.
+    A Retry-After header in seconds is honored as a minimum.
+    """
+    delay = random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+    if retry_after:
+        try:
+            delay = max(delay, min(BACKOFF_MAX, float(retry_after)))
+        except ValueError:
+            pass
+    return delay
+
+
+# ---------------------- GET --------------------------------------------- #
+def get(url, params=None, timeout=TIMEOUT, retries=MAX_RETRIES):
+    """
+    GET a url through the shared session.
+    Retries 429 and 5xx responses, timeouts and connection errors.
+    Returns:
+        requests.Response: The last response received.
+    Raises:
+        requests.RequestException: If every attempt failed to connect.
+    """
+    attempt = 0
+    while True:
+        try:
+            response = session().get(url, params=params, timeout=timeout)
+        except (requests.ConnectionError, requests.Timeout):
+            if attempt >= retries:
+                raise
+            time.sleep(backoff_delay(attempt))
+        else:
+            if response.status_code not in RETRY_STATUS \
+                    or attempt >= retries:
+                return response
+            retry_after = response.headers.get("Retry-After")
+            # Release the connection back to the pool before waiting
+            response.close()
+            time.sleep(backoff_delay(attempt, retry_after))
+        attempt += 1
+
+
+# ---------------------- FEED URL ---------------------------------------- #
+def feed_url(lat, lng):
+    """Return the AQICN geo feed url for a latitude, longitude"""
+    return f"{AQICN_BASE_URL}/feed/geo:{lat};{lng}/"
+
+
+# ---------------------- GET FEED ---------------------------------------- #
+def get_feed(lat, lng):
+    """Request the AQICN geo feed, returns the requests.Response"""
+    return get(feed_url(lat, lng), params={"token": api_key.API_KEY})
+
+
+# ---------------------- STATION URL ------------------------------------- #
+def station_url(idx):
+    """Return the AQICN feed url of a station by its idx"""
+    return f"{AQICN_BASE_URL}/feed/@{idx}/"
+
+
+# ---------------------- FETCH STATION FEED ------------------------------ #
+def fetch_station_feed(idx):
+    """
+    Request the AQICN feed of a station by its idx, skipping the
+    nearest station search of the geo feed.
+    Returns the JSON data as a Python dictionary,
+    or None if the API is unavailable.
+    """
+    response = get(station_url(idx), params={"token": api_key.API_KEY})
+    if response.status_code == 200:
+        return response.json()
+    return None
+
+
+# ---------------------- FETCH FEED -------------------------------------- #
+def fetch_feed(lat, lng):
+    """
+    Request the AQICN feed for a latitude, longitude.
+    Returns the JSON data as a Python dictionary,
+    or None if the API is unavailable.
+    """
+    response = get_feed(lat, lng)
+    if response.status_code == 200:
+        return response.json()
+    return None
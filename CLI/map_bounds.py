@@ -0,0 +1,194 @@
+"""
+    Name: map_bounds.py
+    Author: William A Loring
+    Created: 10/18/2026
+    Purpose: Bulk fetch every station in a region with the AQICN
+    map bounds endpoint, split into tiles fetched concurrently
+"""
+
+import asyncio
+import csv
+# pip install numpy
+import numpy as np
+import api_key
+import async_client
+import http_client
+
+# Tile size in degrees, large boxes are split into tiles this size
+DEFAULT_TILE_DEGREES = 5.0
+
+
+# ---------------------- BOUNDS URL -------------------------------------- #
+def bounds_url():
+    """Return the AQICN map bounds url"""
+    return f"{http_client.AQICN_BASE_URL}/map/bounds"
+
+
+# ---------------------- SPLIT TILES ------------------------------------- #
+def split_tiles(lat1, lng1, lat2, lng2, tile_degrees=DEFAULT_TILE_DEGREES):
+    """
+    Split a bounding box into tiles no larger than tile_degrees.
+    Corners may be given in any order, the box does not cross the
+    antimeridian.
+    Returns:
+        list: (south, west, north, east) tuples covering the box.
+    """
+    south, north = sorted((float(lat1), float(lat2)))
+    west, east = sorted((float(lng1), float(lng2)))
+    lat_edges = np.linspace(
+        south, north, max(1, int(np.ceil((north - south) / tile_degrees))) + 1)
+    lng_edges = np.linspace(
+        west, east, max(1, int(np.ceil((east - west) / tile_degrees))) + 1)
+    return [
+        (float(lat_edges[i]), float(lng_edges[j]),
+         float(lat_edges[i + 1]), float(lng_edges[j + 1]))
+        for i in range(len(lat_edges) - 1)
+        for j in range(len(lng_edges) - 1)
+    ]
+
+
+class StationTable:
+    """
+    Compact columnar table of stations, one row per station uid.
+    aqi is NaN where the station reports "-".
+    """
+
+    __slots__ = ("uid", "lat", "lng", "aqi", "name", "time")
+
+    def __init__(self, uid, lat, lng, aqi, name, time):
+        self.uid = uid
+        self.lat = lat
+        self.lng = lng
+        self.aqi = aqi
+        # Python lists, strings do not benefit from NumPy
+        self.name = name
+        self.time = time
+
+    def __len__(self):
+        return len(self.uid)
+
+# ---------------------- FROM ENTRIES ------------------------------------ #
+    @classmethod
+    def from_entries(cls, entries):
+        """
+        Build the table from map bounds entries, stations appearing in
+        more than one tile are kept once.
+        """
+        unique = {}
+        for entry in entries:
+            uid = entry.get("uid")
+            if uid is not None:
+                unique[uid] = entry
+        rows = list(unique.values())
+        station = [entry.get("station") or {} for entry in rows]
+        return cls(
+            uid=np.array([entry["uid"] for entry in rows], dtype=np.int64),
+            lat=np.array([entry.get("lat") for entry in rows], dtype=float),
+            lng=np.array([entry.get("lon") for entry in rows], dtype=float),
+            aqi=np.array([_aqi(entry.get("aqi")) for entry in rows]),
+            name=[info.get("name") for info in station],
+            time=[info.get("time") for info in station],
+        )
+
+# ---------------------- WORST ------------------------------------------- #
+    def worst(self, count=10):
+        """Return the row indexes of the highest AQI stations"""
+        order = np.argsort(np.where(np.isnan(self.aqi), -1, self.aqi))
+        return order[::-1][:count]
+
+# ---------------------- ROWS -------------------------------------------- #
+    def rows(self, indexes=None):
+        """Yield (uid, lat, lng, aqi, name, time) tuples"""
+        if indexes is None:
+            indexes = range(len(self))
+        for i in indexes:
+            aqi = None if np.isnan(self.aqi[i]) else float(self.aqi[i])
+            yield (int(self.uid[i]), float(self.lat[i]), float(self.lng[i]),
+                   aqi, self.name[i], self.time[i])
+
+# ---------------------- WRITE CSV --------------------------------------- #
+    def write_csv(self, path):
+        """Write the table to a CSV file"""
+        with open(path, "w", newline="", encoding="utf-8") as file:
+            writer = csv.writer(file)
+            writer.writerow(self.__slots__)
+            writer.writerows(self.rows())
+
+
+# ---------------------- AQI --------------------------------------------- #
+def _aqi(value):
+    """Map bounds report the AQI as a string, "-" when unavailable"""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+# ---------------------- FETCH TILES ------------------------------------- #
+async def fetch_tiles(tiles, client):
+    """
+    Fetch every tile concurrently.
+    Returns:
+        tuple: (entries, failed) with the station entries of every tile
+        and the tiles that could not be fetched.
+    """
+    async def fetch_tile(tile):
+        south, west, north, east = tile
+        data = await client.get_json(bounds_url(), params={
+            "token": api_key.API_KEY,
+            "latlng": f"{south},{west},{north},{east}",
+        })
+        if not data or data.get("status") != "ok":
+            raise ConnectionError(f"API unavailable for tile {tile}")
+        return data.get("data") or []
+
+    results = await asyncio.gather(
+        *[fetch_tile(tile) for tile in tiles], return_exceptions=True)
+    entries, failed = [], []
+    for tile, result in zip(tiles, results):
+        if isinstance(result, BaseException):
+            failed.append(tile)
+        else:
+            entries.extend(result)
+    return entries, failed
+
+
+# ---------------------- FETCH REGION ------------------------------------ #
+async def fetch_region_async(lat1, lng1, lat2, lng2,
+                             tile_degrees=DEFAULT_TILE_DEGREES, client=None):
+    """
+    Fetch every station in a bounding box.
+    Returns:
+        tuple: (StationTable, failed tiles)
+    """
+    tiles = split_tiles(lat1, lng1, lat2, lng2, tile_degrees)
+    if client is None:
+        async with async_client.AsyncClient() as client:
+            entries, failed = await fetch_tiles(tiles, client)
+    else:
+        entries, failed = await fetch_tiles(tiles, client)
+    return StationTable.from_entries(entries), failed
+
+
+def fetch_region(lat1, lng1, lat2, lng2, tile_degrees=DEFAULT_TILE_DEGREES):
+    """Blocking version of fetch_region_async()"""
+    return asyncio.run(
+        fetch_region_async(lat1, lng1, lat2, lng2, tile_degrees))
+
+
+# ---------------------- RUN REGION -------------------------------------- #
+def run_region(bounds, tile_degrees=DEFAULT_TILE_DEGREES, out=None, top=20):
+    """Fetch a region and print the worst stations, optionally save CSV"""
+    lat1, lng1, lat2, lng2 = [float(value) for value in bounds.split(",")]
+    table, failed = fetch_region(lat1, lng1, lat2, lng2, tile_degrees)
+
+    print(f" [+] {len(table)} stations")
+    if failed:
+        print(f"[-] {len(failed)} tiles could not be fetched")
+    print("", "-"*70)
+    for uid, lat, lng, aqi, name, time in table.rows(table.worst(top)):
+        aqi = "NA" if aqi is None else f"{aqi:g}"
+        print(f" {aqi:>5} {name}")
+    if out:
+        table.write_csv(out)
+        print(f" [+] Saved {out}")
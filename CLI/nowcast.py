@@ -0,0 +1,162 @@
+"""
+    Name: nowcast.py
+    Author: William A Loring
+    Created: 10/18/2026
+    Purpose: US EPA NowCast from hourly PM2.5, PM10 and ozone history
+    Vectorized over many stations, one row of hourly averages each
+"""
+
+import time
+# pip install numpy
+import numpy as np
+import aqi_engine
+
+SECONDS_PER_HOUR = 60 * 60
+
+# Reading field: (aqi_engine pollutant, hours, minimum weight factor)
+# PM uses 12 hours weighted no lower than 0.5, ozone 8 hours unclamped
+NOWCAST = {
+    "pm25": ("pm25", 12, 0.5),
+    "pm10": ("pm10", 12, 0.5),
+    "o3": ("o3_8h", 8, 0.0),
+}
+
+# Of the 3 most recent hours at least 2 must have data
+RECENT_HOURS = 3
+RECENT_REQUIRED = 2
+
+
+# ---------------------- NOWCAST ----------------------------------------- #
+def nowcast(hourly, min_weight=0.5):
+    """
+    Compute the NowCast of hourly average concentrations.
+    Args:
+        hourly (array_like): (stations, hours) concentrations, column 0
+            the most recent hour, NaN for hours without data.
+        min_weight (float): Lowest weight factor, 0.5 for PM.
+    Returns:
+        numpy.ndarray: NowCast concentration of each station, NaN if
+        fewer than 2 of its 3 most recent hours have data.
+    """
+    hourly = np.atleast_2d(np.asarray(hourly, dtype=float))
+    valid = ~np.isnan(hourly)
+
+    # Weight factor from the range of the hours with data
+    with np.errstate(invalid="ignore", divide="ignore"):
+        low = np.min(np.where(valid, hourly, np.inf), axis=1)
+        high = np.max(np.where(valid, hourly, -np.inf), axis=1)
+        weight = np.where(high > 0, 1 - (high - low) / high, 1.0)
+    weight = np.maximum(weight, min_weight)
+
+    # Hour i is weighted weight**i, missing hours count for nothing
+    powers = weight[:, np.newaxis] ** np.arange(hourly.shape[1])
+    powers = np.where(valid, powers, 0.0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        result = (np.where(valid, hourly, 0.0) * powers).sum(axis=1) \
+            / powers.sum(axis=1)
+
+    recent = valid[:, :RECENT_HOURS].sum(axis=1)
+    result[recent < RECENT_REQUIRED] = np.nan
+    return result
+
+
+# ---------------------- HOURLY MEANS ------------------------------------ #
+def hourly_means(rows, times, values, stations, hours, now):
+    """
+    Average readings into clock hours, most recent hour first.
+    Args:
+        rows (array_like): Row of each reading, 0 to stations - 1.
+        times (array_like): Unix time of each reading.
+        values (array_like): Value of each reading, NaN for missing.
+        stations (int): Number of rows in the result.
+        hours (int): Number of hours in the result.
+        now (float): Unix time in the most recent hour.
+    Returns:
+        numpy.ndarray: (stations, hours) averages, NaN where an hour
+        has no readings.
+    """
+    rows = np.asarray(rows, dtype=np.int64)
+    times = np.asarray(times, dtype=float)
+    values = np.asarray(values, dtype=float)
+    hour = (np.floor(now / SECONDS_PER_HOUR)
+            - np.floor(times / SECONDS_PER_HOUR)).astype(np.int64)
+    keep = (hour >= 0) & (hour < hours) & ~np.isnan(values)
+
+    cells = rows[keep] * hours + hour[keep]
+    sums = np.bincount(cells, values[keep], stations * hours)
+    counts = np.bincount(cells, minlength=stations * hours)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return (sums / counts).reshape(stations, hours)
+
+
+# ---------------------- NOWCAST AQI ------------------------------------- #
+def nowcast_aqi(field, rows, times, aqi, stations, now=None):
+    """
+    NowCast AQI of one reading field for many stations.
+    Readings hold AQI values, they are converted to concentrations,
+    averaged hourly, NowCast and converted back to AQI.
+    Args:
+        field (str): A key of NOWCAST.
+        rows, times, aqi (array_like): Station row, Unix time and AQI
+            value of each reading.
+        stations (int): Number of station rows.
+        now (float): Unix time of the NowCast, default the current time.
+    Returns:
+        numpy.ndarray: AQI of each station row, NaN if not enough data.
+    """
+    pollutant, hours, min_weight = NOWCAST[field]
+    if now is None:
+        now = time.time()
+    concentrations = aqi_engine.concentration(pollutant, aqi)
+    hourly = hourly_means(rows, times, concentrations, stations, hours, now)
+    return aqi_engine.sub_index(pollutant, nowcast(hourly, min_weight))
+
+
+# ---------------------- NOWCAST SERIES ---------------------------------- #
+def nowcast_series(series, stations, now=None):
+    """
+    NowCast AQI of every NOWCAST field for many stations.
+    Args:
+        series (callable): series(station, field, start, end) returns
+            (times, values) arrays, e.g. ReadingsStore.series.
+        stations (iterable): Station idx values.
+        now (float): Unix time of the NowCast, default the current time.
+    Returns:
+        dict: station: {field: AQI}, fields without enough data left out.
+    """
+    if now is None:
+        now = time.time()
+    stations = list(stations)
+    results = {station: {} for station in stations}
+    if not stations:
+        return results
+    for field, (pollutant, hours, min_weight) in NOWCAST.items():
+        # Start of the oldest hour that counts
+        start = (np.floor(now / SECONDS_PER_HOUR) - hours + 1) \
+            * SECONDS_PER_HOUR
+        fetched = [series(station, field, start, now)
+                   for station in stations]
+        rows = np.repeat(np.arange(len(stations)),
+                         [len(times) for times, values in fetched])
+        times = np.concatenate([times for times, values in fetched])
+        values = np.concatenate([values for times, values in fetched])
+        aqi = nowcast_aqi(field, rows, times, values, len(stations), now)
+        for station, value in zip(stations, aqi):
+            if not np.isnan(value):
+                results[station][field] = int(value)
+    return results
+
+
+# ---------------------- NOWCAST BATCH ----------------------------------- #
+def nowcast_batch(store, stations, now=None):
+    """NowCast AQI of stations from the history in a ReadingsStore"""
+    return nowcast_series(store.series, stations, now)
+
+
+# ---------------------- NOWCAST STATS ----------------------------------- #
+def nowcast_stats(stats, stations, now=None):
+    """
+    NowCast AQI of stations from the windows of a RollingStats,
+    for front ends without a readings store. Needs no I/O.
+    """
+    return nowcast_series(stats.series, stations, now)
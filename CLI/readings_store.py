@@ -0,0 +1,275 @@
+"""
+    Name: readings_store.py
+    Author: William A Loring
+    Created: 10/18/2026
+    Purpose: Local SQLite time-series store of every fetched reading
+    and forecast, with optional Parquet export
+"""
+
+import sqlite3
+import time
+# pip install numpy
+import numpy as np
+import air_quality
+import forecast
+import forecast_diff
+
+# SQLite file that holds the readings history
+STORE_DB = "readings.db"
+
+# Rows buffered before they are written in one transaction
+DEFAULT_BATCH_SIZE = 100
+
+# Reading fields stored as columns, in AirQualityReading slot order
+READING_FIELDS = air_quality.AirQualityReading.__slots__
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS readings (
+    station INTEGER NOT NULL,
+    time REAL NOT NULL,
+    fetched REAL NOT NULL,
+    sensor_location TEXT,
+    lat REAL,
+    lng REAL,
+    aqi REAL,
+    dom_pol TEXT,
+    o3 REAL,
+    pm25 REAL,
+    pm10 REAL,
+    co REAL,
+    so2 REAL,
+    no2 REAL,
+    uvi REAL,
+    temperature_c REAL,
+    humidity REAL,
+    wind_speed_ms REAL,
+    pressure_hpa REAL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS readings_station_time
+    ON readings (station, time);
+CREATE INDEX IF NOT EXISTS readings_time ON readings (time);
+CREATE TABLE IF NOT EXISTS forecasts (
+    station INTEGER NOT NULL,
+    day TEXT NOT NULL,
+    pollutant TEXT NOT NULL,
+    avg REAL,
+    min REAL,
+    max REAL,
+    fetched REAL NOT NULL,
+    PRIMARY KEY (station, day, pollutant)
+);
+"""
+
+
+class ReadingsStore:
+    """
+    Append-only store of AirQualityReading rows and upserted forecasts.
+    Writes are buffered and flushed in batches, call flush() or close()
+    before reading back what was just added.
+    Only forecast days the tracker reports as new or changed are written.
+    """
+
+    def __init__(self, path=STORE_DB, batch_size=DEFAULT_BATCH_SIZE,
+                 tracker=forecast_diff.FORECAST_CHANGES):
+        self.path = path
+        self.batch_size = batch_size
+        self.tracker = tracker
+        self._readings = []
+        self._forecasts = []
+        self._conn = None
+
+# ---------------------- CONNECTION -------------------------------------- #
+    def _connect(self):
+        """Open the database in WAL mode on first use"""
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path)
+            # WAL lets reports read while the daemon writes
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(SCHEMA)
+        return self._conn
+
+# ---------------------- ADD READING ------------------------------------- #
+    def add_reading(self, reading, fetched=None):
+        """Buffer an AirQualityReading, skipped if it has no station"""
+        if reading.station is None:
+            return
+        fetched = time.time() if fetched is None else fetched
+        row = reading.as_dict()
+        if row["time"] is None:
+            row["time"] = fetched
+        row["fetched"] = fetched
+        self._readings.append(row)
+        if len(self._readings) >= self.batch_size:
+            self.flush()
+
+# ---------------------- ADD FORECAST ------------------------------------ #
+    def add_forecast(self, station, daily, fetched=None, days=None):
+        """
+        Buffer a Forecast for a station.
+        Days already stored are replaced with the newer forecast.
+        days is an optional set of (pollutant, "YYYY-MM-DD") to keep.
+        """
+        if station is None:
+            return
+        fetched = time.time() if fetched is None else fetched
+        for pollutant in daily.avg:
+            avg = daily.column(pollutant, "avg")
+            low = daily.column(pollutant, "min")
+            high = daily.column(pollutant, "max")
+            for i, day in enumerate(daily.days):
+                if days is not None and (pollutant, str(day)) not in days:
+                    continue
+                self._forecasts.append((
+                    station, str(day), pollutant,
+                    _nullable(avg[i]), _nullable(low[i]),
+                    _nullable(high[i]), fetched
+                ))
+        if len(self._forecasts) >= self.batch_size:
+            self.flush()
+
+# ---------------------- ADD FEED ---------------------------------------- #
+    def add_feed(self, data, fetched=None):
+        """
+        Buffer the reading and the changed forecast days of an AQICN
+        feed dictionary. An unchanged forecast is not parsed at all.
+        """
+        reading = air_quality.AirQualityReading.from_feed(data)
+        self.add_reading(reading, fetched)
+        changes = self.tracker.update(data)
+        if changes:
+            self.add_forecast(
+                reading.station, forecast.Forecast.from_feed(data), fetched,
+                {(change.pollutant, change.day) for change in changes})
+        return reading
+
+# ---------------------- FLUSH ------------------------------------------- #
+    def flush(self):
+        """Write buffered rows in one transaction"""
+        if not self._readings and not self._forecasts:
+            return
+        columns = ("station", "time", "fetched") + tuple(
+            name for name in READING_FIELDS if name not in ("station", "time"))
+        conn = self._connect()
+        with conn:
+            # A station reports each observation time once, repeat
+            # fetches of the same observation are ignored
+            conn.executemany(
+                f"INSERT OR IGNORE INTO readings ({', '.join(columns)}) "
+                f"VALUES ({', '.join(':' + name for name in columns)})",
+                self._readings
+            )
+            conn.executemany(
+                "INSERT OR REPLACE INTO forecasts "
+                "(station, day, pollutant, avg, min, max, fetched) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                self._forecasts
+            )
+        self._readings = []
+        self._forecasts = []
+
+# ---------------------- READINGS ---------------------------------------- #
+    def readings(self, station, start=None, end=None):
+        """
+        Return the AirQualityReadings of a station between start and end
+        Unix times, inclusive, oldest first.
+        """
+        self.flush()
+        fields = ", ".join(READING_FIELDS)
+        query, params = _time_range(
+            f"SELECT {fields} FROM readings WHERE station = ?",
+            [station], start, end)
+        rows = self._connect().execute(query + " ORDER BY time", params)
+        return [air_quality.AirQualityReading(*row) for row in rows]
+
+# ---------------------- SERIES ------------------------------------------ #
+    def series(self, station, field, start=None, end=None):
+        """
+        Return (times, values) NumPy arrays of one reading field for a
+        station, oldest first, NaN where the value was missing.
+        """
+        if field not in READING_FIELDS:
+            raise ValueError(f"Unknown reading field: {field}")
+        self.flush()
+        query, params = _time_range(
+            f"SELECT time, {field} FROM readings WHERE station = ?",
+            [station], start, end)
+        rows = self._connect().execute(query + " ORDER BY time", params)
+        data = np.array(rows.fetchall(), dtype=float).reshape(-1, 2)
+        return data[:, 0], data[:, 1]
+
+# ---------------------- FORECASTS --------------------------------------- #
+    def forecasts(self, station, first_day=None, last_day=None):
+        """
+        Return stored forecast rows (day, pollutant, avg, min, max)
+        for a station, ordered by day.
+        """
+        self.flush()
+        query = ("SELECT day, pollutant, avg, min, max "
+                 "FROM forecasts WHERE station = ?")
+        params = [station]
+        if first_day is not None:
+            query += " AND day >= ?"
+            params.append(str(first_day))
+        if last_day is not None:
+            query += " AND day <= ?"
+            params.append(str(last_day))
+        rows = self._connect().execute(
+            query + " ORDER BY day, pollutant", params)
+        return rows.fetchall()
+
+# ---------------------- STATIONS ---------------------------------------- #
+    def stations(self):
+        """Return the station ids with stored readings"""
+        self.flush()
+        rows = self._connect().execute(
+            "SELECT DISTINCT station FROM readings ORDER BY station")
+        return [row[0] for row in rows]
+
+# ---------------------- EXPORT PARQUET ---------------------------------- #
+    def export_parquet(self, path, table="readings"):
+        """
+        Write a table to a Parquet file.
+        Requires pyarrow: pip install pyarrow
+        """
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise Exception("Parquet export requires pyarrow: "
+                            "pip install pyarrow")
+        if table not in ("readings", "forecasts"):
+            raise ValueError(f"Unknown table: {table}")
+        self.flush()
+        cursor = self._connect().execute(f"SELECT * FROM {table}")
+        names = [column[0] for column in cursor.description]
+        columns = list(zip(*cursor.fetchall())) or [[] for name in names]
+        arrow_table = pa.table(
+            {name: list(column) for name, column in zip(names, columns)})
+        pq.write_table(arrow_table, path)
+
+# ---------------------- CLOSE ------------------------------------------- #
+    def close(self):
+        """Flush buffered rows and close the database"""
+        self.flush()
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+# ---------------------- NULLABLE ---------------------------------------- #
+def _nullable(value):
+    """Convert a NaN forecast value to None for SQLite"""
+    return None if np.isnan(value) else float(value)
+
+
+# ---------------------- TIME RANGE -------------------------------------- #
+def _time_range(query, params, start, end):
+    """Add optional start and end time conditions to a query"""
+    if start is not None:
+        query += " AND time >= ?"
+        params.append(start)
+    if end is not None:
+        query += " AND time <= ?"
+        params.append(end)
+    return query, params
@@ -0,0 +1,98 @@
+"""
+    Name: sinks.py
+    Author: William A Loring
+    Created: 10/18/2026
+    Purpose: Output sinks for records produced by the headless daemon
+"""
+
+import json
+import queue
+import sys
+import threading
+import http_client
+
+
+class StdoutSink:
+    """Print each record as one line of JSON"""
+
+    def write(self, record):
+        print(json.dumps(record, default=str), file=sys.stdout, flush=True)
+
+    def close(self):
+        pass
+
+
+class JsonLinesSink:
+    """Append each record as one line of JSON to a file"""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "a", encoding="utf-8")
+
+    def write(self, record):
+        self._file.write(json.dumps(record, default=str) + "\n")
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+class WebhookSink:
+    """
+    POST each record as JSON to a URL.
+    Records are queued and posted by a worker thread, a slow or dead
+    webhook never blocks the daemon's event loop.
+    """
+
+    def __init__(self, url):
+        self.url = url
+        self._queue = queue.Queue()
+        self._worker = threading.Thread(
+            target=self._run, name="webhook-sink", daemon=True)
+        self._worker.start()
+
+    def write(self, record):
+        self._queue.put(json.dumps(record, default=str))
+
+    def _run(self):
+        while True:
+            body = self._queue.get()
+            if body is None:
+                return
+            self._post(body)
+
+    def _post(self, body):
+        try:
+            response = http_client.session().post(
+                self.url, data=body,
+                headers={"Content-Type": "application/json"},
+                timeout=http_client.TIMEOUT)
+            response.close()
+            if response.status_code >= 400:
+                print(f"[-] Webhook {self.url}: {response.status_code}")
+        except Exception as e:
+            # A webhook being down must not stop the daemon
+            print(f"[-] Webhook {self.url}: {e}")
+
+    def close(self):
+        """Post the records still queued, then stop the worker"""
+        self._queue.put(None)
+        self._worker.join()
+
+
+# ---------------------- CREATE SINK ------------------------------------- #
+def create_sink(spec):
+    """
+    Create a sink from a spec string:
+        "stdout"             print to standard output
+        "jsonl:path.jsonl"   append to a JSON lines file
+        "webhook:https://..." POST to a URL
+    """
+    kind, _, target = spec.partition(":")
+    if kind == "stdout":
+        return StdoutSink()
+    if kind == "jsonl" and target:
+        return JsonLinesSink(target)
+    if kind == "webhook" and target:
+        return WebhookSink(target)
+    raise ValueError(f"Unknown sink: {spec}")
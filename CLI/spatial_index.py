@@ -0,0 +1,211 @@
+"""
+    Name: spatial_index.py
+    Author: William A Loring
+    Created: 10/18/2026
+    Purpose: In-memory spatial index of points on the Earth
+    Points are bucketed in a latitude, longitude grid, queries only
+    measure haversine distances to points in nearby cells
+"""
+
+import json
+import math
+import os
+import threading
+# pip install numpy
+import numpy as np
+
+# Mean radius of the Earth
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+# Half the circumference, no two points are further apart
+MAX_DISTANCE_KM = math.pi * EARTH_RADIUS_KM
+
+# Grid cell size in degrees, 1 degree is about 111 km of latitude
+DEFAULT_CELL_DEGREES = 1.0
+
+
+# ---------------------- HAVERSINE KM ------------------------------------ #
+def haversine_km(lat1, lng1, lat2, lng2):
+    """
+    Great circle distance in km, works on scalars or NumPy arrays.
+    """
+    lat1, lng1, lat2, lng2 = (
+        np.radians(np.asarray(value, dtype=float))
+        for value in (lat1, lng1, lat2, lng2))
+    a = (np.sin((lat2 - lat1) / 2) ** 2 +
+         np.cos(lat1) * np.cos(lat2) * np.sin((lng2 - lng1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1)))
+
+
+class SpatialIndex:
+    """
+    Grid index of keyed points with an optional value per point.
+    Inserting an existing key moves the point and replaces its value.
+    Values must be JSON serializable to save() the index.
+    """
+
+    def __init__(self, cell_degrees=DEFAULT_CELL_DEGREES):
+        self.cell_degrees = cell_degrees
+        self._lng_cells = max(1, round(360 / cell_degrees))
+        # Point coordinates, grown by doubling
+        self._lat = np.empty(64)
+        self._lng = np.empty(64)
+        self._keys = []
+        self._values = []
+        # key: row
+        self._rows = {}
+        # (lat cell, lng cell): list of rows
+        self._cells = {}
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __contains__(self, key):
+        return key in self._rows
+
+# ---------------------- CELL -------------------------------------------- #
+    def _cell(self, lat, lng):
+        return (math.floor(lat / self.cell_degrees),
+                math.floor(lng / self.cell_degrees) % self._lng_cells)
+
+# ---------------------- INSERT ------------------------------------------ #
+    def insert(self, key, lat, lng, value=None):
+        """Add a point, or move an existing key and replace its value"""
+        lat, lng = float(lat), float(lng)
+        cell = self._cell(lat, lng)
+        with self._lock:
+            row = self._rows.get(key)
+            if row is None:
+                row = len(self._keys)
+                if row == len(self._lat):
+                    self._lat = np.resize(self._lat, row * 2)
+                    self._lng = np.resize(self._lng, row * 2)
+                self._keys.append(key)
+                self._values.append(value)
+                self._rows[key] = row
+            else:
+                old = self._cell(self._lat[row], self._lng[row])
+                self._values[row] = value
+                if old == cell:
+                    self._lat[row], self._lng[row] = lat, lng
+                    return
+                self._cells[old].remove(row)
+            self._lat[row], self._lng[row] = lat, lng
+            self._cells.setdefault(cell, []).append(row)
+
+    def extend(self, keys, lats, lngs, values=None):
+        """Insert many points"""
+        if values is None:
+            values = [None] * len(keys)
+        with self._lock:
+            for key, lat, lng, value in zip(keys, lats, lngs, values):
+                self.insert(key, lat, lng, value)
+
+# ---------------------- GET --------------------------------------------- #
+    def get(self, key):
+        """Return (lat, lng, value) of a key, or None"""
+        with self._lock:
+            row = self._rows.get(key)
+            if row is None:
+                return None
+            return (float(self._lat[row]), float(self._lng[row]),
+                    self._values[row])
+
+# ---------------------- CANDIDATES -------------------------------------- #
+    def _candidates(self, lat, lng, km):
+        """Rows in every grid cell that could hold a point within km"""
+        if km >= MAX_DISTANCE_KM or not self._cells:
+            return np.arange(len(self._keys))
+
+        dlat = km / KM_PER_DEGREE
+        lat_low, lng_cell = self._cell(lat - dlat, lng)
+        lat_high = self._cell(lat + dlat, lng)[0]
+
+        # Degrees of longitude shrink towards the poles, widen the
+        # search by the most poleward latitude in range
+        poleward = min(90.0, abs(lat) + dlat)
+        if poleward >= 89.9:
+            span = self._lng_cells
+        else:
+            dlng = dlat / math.cos(math.radians(poleward))
+            span = math.ceil(dlng / self.cell_degrees) + 1
+        if 2 * span + 1 >= self._lng_cells:
+            lng_range = range(self._lng_cells)
+        else:
+            lng_range = [(lng_cell + offset) % self._lng_cells
+                         for offset in range(-span, span + 1)]
+
+        rows = []
+        for lat_cell in range(lat_low, lat_high + 1):
+            for cell in lng_range:
+                rows.extend(self._cells.get((lat_cell, cell), ()))
+        return np.array(rows, dtype=np.intp)
+
+# ---------------------- RADIUS ------------------------------------------ #
+    def radius(self, lat, lng, km):
+        """
+        Points within km of lat, lng.
+        Returns:
+            list: (key, distance km, value) tuples, nearest first.
+        """
+        with self._lock:
+            rows = self._candidates(float(lat), float(lng), km)
+            if len(rows) == 0:
+                return []
+            distance = haversine_km(lat, lng, self._lat[rows], self._lng[rows])
+            inside = distance <= km
+            rows, distance = rows[inside], distance[inside]
+            order = np.argsort(distance, kind="stable")
+            return [(self._keys[row], float(distance[i]), self._values[row])
+                    for i, row in zip(order, rows[order])]
+
+# ---------------------- NEAREST ----------------------------------------- #
+    def nearest(self, lat, lng, k=1, max_km=MAX_DISTANCE_KM):
+        """
+        The k nearest points to lat, lng, no further than max_km.
+        The search radius doubles from one grid cell until it holds
+        k points, every point outside a radius is further than all
+        points inside it.
+        Returns:
+            list: (key, distance km, value) tuples, nearest first.
+        """
+        km = min(self.cell_degrees * KM_PER_DEGREE, max_km)
+        with self._lock:
+            while True:
+                found = self.radius(lat, lng, km)
+                if len(found) >= k or km >= max_km:
+                    return found[:k]
+                km = min(km * 2, max_km)
+
+# ---------------------- SAVE -------------------------------------------- #
+    def save(self, path):
+        """Write the index to a .npz file, replaced atomically"""
+        with self._lock:
+            count = len(self._keys)
+            temp = f"{path}.tmp"
+            with open(temp, "wb") as file:
+                np.savez(
+                    file,
+                    cell_degrees=self.cell_degrees,
+                    lat=self._lat[:count],
+                    lng=self._lng[:count],
+                    keys=json.dumps(self._keys),
+                    values=json.dumps(self._values),
+                )
+        os.replace(temp, path)
+
+# ---------------------- LOAD -------------------------------------------- #
+    @classmethod
+    def load(cls, path):
+        """Read an index written by save()"""
+        with np.load(path, allow_pickle=False) as saved:
+            index = cls(float(saved["cell_degrees"]))
+            index.extend(
+                json.loads(str(saved["keys"])),
+                saved["lat"],
+                saved["lng"],
+                json.loads(str(saved["values"])),
+            )
+        return index
@@ -0,0 +1,79 @@
+"""
+    Name: station_map.py
+    Author: William A Loring
+    Created: 10/18/2026
+    Purpose: Persistent map of location to AQICN station idx
+    A location seen before is fetched with /feed/@idx directly,
+    skipping both geocoding and the geo feed's station search
+"""
+
+import geocode_cache
+import station_index
+
+# Stations rarely move or close, remap a location after 90 days
+STATION_TTL = 90 * 24 * 60 * 60
+
+
+class StationMap:
+    """
+    (city, state, country) to [station idx, address], stored in the
+    geocode cache database in its own table.
+    """
+
+    def __init__(self, cache=None, stations=station_index.STATIONS):
+        if cache is None:
+            cache = geocode_cache.GeocodeCache(
+                ttl=STATION_TTL, table="station")
+        self.cache = cache
+        self.stations = stations
+
+# ---------------------- GET --------------------------------------------- #
+    def get(self, city, state, country):
+        """Return (station idx, address) of a location, or None"""
+        entry = self.cache.get(
+            geocode_cache.location_key(city, state, country))
+        return None if entry is None else tuple(entry)
+
+# ---------------------- SET --------------------------------------------- #
+    def set(self, city, state, country, address, data):
+        """Remember the station of a successful feed for a location"""
+        station = station_index.station_location(data)
+        if station is None or data.get("status") != "ok":
+            return
+        self.cache.set(
+            geocode_cache.location_key(city, state, country),
+            [station[0], address])
+
+# ---------------------- FETCH ------------------------------------------- #
+    def fetch(self, city, state, country, geocode, fetch_feed,
+              fetch_station_feed):
+        """
+        Return (address, data) for a location.
+        A mapped location is fetched by station idx, otherwise it is
+        geocoded, fetched by coordinates and its station remembered.
+        Args:
+            geocode (callable): geocode(city, state, country) returns
+                (lat, lng, address), raises if not found.
+            fetch_feed (callable): fetch_feed(lat, lng) returns the feed.
+            fetch_station_feed (callable): fetch_station_feed(idx)
+                returns the feed of one station.
+        Returns:
+            tuple: (address, data), data is None if the API is unavailable.
+        """
+        mapped = self.get(city, state, country)
+        if mapped is not None:
+            idx, address = mapped
+            data = self.stations.fetch_station(idx, fetch_station_feed)
+            if data is not None and data.get("status") == "ok":
+                return address, data
+            # The station is gone or unavailable, resolve it again
+
+        lat, lng, address = geocode(city, state, country)
+        data = self.stations.fetch(lat, lng, fetch_feed)
+        if data is not None:
+            self.set(city, state, country, address, data)
+        return address, data
+
+
+# Shared map used by the CLI, Tkinter and PySide6 front ends
+STATION_MAP = StationMap()
@@ -0,0 +1,53 @@
+"""
+    Name: test_alerts.py
+    Author: William A Loring
+    Created: 10/18/2026
+    Purpose: Pin down the units of alert thresholds
+    Run from this folder with: python -m pytest test_alerts.py
+"""
+
+import pytest
+import air_quality
+import alerts
+
+
+def reading(pm25, when):
+    return air_quality.AirQualityReading(station=9526, time=when, pm25=pm25)
+
+
+def fired(rule, values):
+    """AQI values fed one minute apart, return the triggered values"""
+    engine = alerts.AlertEngine([rule])
+    events = []
+    for minute, value in enumerate(values):
+        events += engine.evaluate(reading(value, minute * 60))
+    return [event["value"] for event in events
+            if event["state"] == alerts.TRIGGERED]
+
+
+def test_thresholds_are_aqi_by_default():
+    # iaqi pm25 35 is about 10 µg/m³, Good, and must not fire
+    rule = alerts.Rule("pm25", "pm25", above=100)
+    assert fired(rule, [35, 100, 101]) == [101]
+
+
+def test_concentration_threshold_is_compared_as_aqi():
+    # 35 µg/m³ is AQI 99, AQI 35 must not fire, AQI 100 (35.4 µg/m³) does
+    rule = alerts.Rule("pm25", "pm25", above=35, units="concentration")
+    assert rule.above == 99
+    assert rule.threshold == 35
+    assert fired(rule, [35, 99, 100]) == [100]
+
+
+def test_load_rules_reads_units():
+    rule, = alerts.load_rules(
+        [{"field": "pm25", "above": 35, "units": "concentration"}])
+    assert rule.units == alerts.CONCENTRATION
+    assert rule.above == 99
+
+
+def test_concentration_needs_a_pollutant_field():
+    with pytest.raises(ValueError):
+        alerts.Rule("aqi", "aqi", above=35, units="concentration")
+    with pytest.raises(ValueError):
+        alerts.Rule("pm25", "pm25", above=35, units="ppm")
@@ -8,41 +8,37 @@
 import sys
 # pip install PySide6
 from PySide6.QtWidgets import QApplication, QMainWindow
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, Signal
 from PySide6.QtGui import QIcon
-# pip install requests
-import requests
-import api_key
 # pip install geopy
-from geopy.geocoders import Nominatim
 from geopy.exc import GeocoderTimedOut, GeocoderUnavailable
-import weather_utils
+import geocode_geopy
+import air_quality
+import forecast
+import forecast_diff
+import nowcast
+import rolling_stats
+import station_index
+import station_map
+import http_client
+import location_session
 from ui_main import Ui_MainWindow
 
-AQICN_ENDPOINT = 'https://api.waqi.info/feed/geo:'
-
 
 def geocode(city, state, country):
     """
     Function to get the latitude, longitude, and formatted address for a given location
     """
-    # Initialize a geolocator object using the Nominatim service (part of OpenStreetMap)
-    geolocator = Nominatim(user_agent="aqicn_app")
-
     # Create a single address string by joining the city, state, and country,
     # filtering out any None values
     address = ", ".join(filter(None, [city, state, country]))
 
     try:
-        # Use the geolocator to get the location details
+        # Use the Nominatim service (part of OpenStreetMap) through the
+        # geocode cache to get the location details
         # (latitude, longitude, address) for the given address
-        location = geolocator.geocode(address)
-
-        # If location is found, return the latitude, longitude, and address
-        if location:
-            return location.latitude, location.longitude, location.address
-        else:
-            # If no location is found, raise a ValueError
-            raise ValueError("Location not found")
+        # Raises ValueError if no location is found
+        return geocode_geopy.lookup(city, state, country, query=address)
 
     # Handle exceptions related to geocoding timeouts or service unavailability
     except (GeocoderTimedOut, GeocoderUnavailable) as e:
@@ -53,6 +49,51 @@ def geocode(city, state, country):
         raise Exception(f"An error occurred during geocoding: {str(e)}")
 
 
+class WorkerSignals(QObject):
+    """Signals a FetchWorker uses to report back to the GUI thread"""
+    # request_id, (city, state, country), address, data
+    finished = Signal(int, object, str, object)
+    # request_id, error message
+    error = Signal(int, str)
+
+
+class FetchWorker(QRunnable):
+    """Geocode a location and fetch its AQICN feed on the thread pool"""
+
+    def __init__(self, request_id, city, state, country):
+        super().__init__()
+        self.request_id = request_id
+        self.key = (city, state, country)
+        self.cancelled = False
+        self.signals = WorkerSignals()
+
+    def run(self):
+        # Superseded before it started, skip the network calls
+        if self.cancelled:
+            return
+        try:
+            # Get the AQI (Air Quality Index) feed and formatted address.
+            # A location seen before is fetched by its station idx,
+            # else geocoded and answered by a known station nearby with
+            # a fresh reading, else through the feed cache
+            address, data = station_map.STATION_MAP.fetch(
+                *self.key, geocode,
+                http_client.fetch_feed, http_client.fetch_station_feed)
+
+            # Check if the response from the API was successful
+            if data is None:
+                raise Exception("API unavailable. Please try again.")
+            station_index.STATIONS.save()
+        except Exception as e:
+            if not self.cancelled:
+                self.signals.error.emit(self.request_id, str(e))
+            return
+
+        if not self.cancelled:
+            self.signals.finished.emit(
+                self.request_id, self.key, address, data)
+
+
 class AQICNGui(QMainWindow, Ui_MainWindow):
     def __init__(self):
         super().__init__()
@@ -60,6 +101,24 @@ class AQICNGui(QMainWindow, Ui_MainWindow):
         self.setupUi(self)
         # Set the window icon
         self.setWindowIcon(QIcon("edit_clear.png"))
+
+        # Geocode and AQICN requests run on the global thread pool
+        self.thread_pool = QThreadPool.globalInstance()
+        # Only the result of the most recent request is displayed
+        self.request_id = 0
+        self.worker = None
+        self.display = None
+        # Feed shared by the current AQI and forecast views
+        self.session = None
+        self.session_max_age = location_session.MAX_AGE
+        # (view, address, content hash) shown in resultsTextEdit,
+        # a view with the same content is not rendered again
+        self.rendered = None
+        # 24 hour averages of every reading shown, kept in memory and
+        # saved once when the window closes
+        self.stats = rolling_stats.RollingStats.load()
+        self.stats_changed = False
+
         self.setup_connections()
 
 # ---------------------------- SETUP CONNECTIONS ------------------------- #
@@ -73,7 +132,13 @@ class AQICNGui(QMainWindow, Ui_MainWindow):
         self.aqiForecastButton.clicked.connect(self.get_aqi_forecast)
 
 # ---------------------------- GET LOCATION ------------------------------ #
-    def get_location(self):
+    def get_location(self, display):
+        """
+        Get the location from the line edits and call display once
+        self.address and self.data are set. The session of the last fetch
+        is reused until the inputs change or it is older than
+        self.session_max_age, otherwise a FetchWorker fetches it.
+        """
         # Get the city, state, and country input from the UI fields
         # and remove any leading/trailing whitespace
         city = self.cityLineEdit.text().strip()
@@ -83,146 +148,147 @@ class AQICNGui(QMainWindow, Ui_MainWindow):
         # If none of the location fields (city, state, country) are filled,
         # prompt the user and stop
         if not any([city, state, country]):
+            self.clear_results()
             self.resultsTextEdit.append(
                 "Please enter at least one location field.")
-            return False
-
-        try:
-            # Geocode the input location to get
-            # latitude, longitude, and formatted address
-            lat, lng, self.address = geocode(city, state, country)
-
-            # Make a request to the AQI (Air Quality Index) API
-            # using the geocoded coordinates
-            response = requests.get(
-                AQICN_ENDPOINT + str(lat) + ";" + str(lng)
-                + "/?token=" + api_key.API_KEY
-            )
+            return
 
-            # Check if the response from the API was successful
-            if response.status_code == 200:
-                # Parse the response as JSON and store the data
-                self.data = response.json()
-                return True
-            else:
-                # If API is unavailable, notify the user
-                self.resultsTextEdit.append(
-                    "[-] API unavailable. Please try again.")
-                return False
+        # A new request supersedes whatever is still running
+        self.cancel_worker()
+        self.request_id += 1
+        self.display = display
+
+        key = (city, state, country)
+        if self.session is not None \
+                and self.session.matches(key, self.session_max_age):
+            # Already fetched and recent enough, no network I/O
+            self.address, self.data = self.session.address, self.session.data
+            display()
+            return
 
-        except Exception as e:
-            # Catch any exceptions and display an error message
-            # in the results text area
-            self.resultsTextEdit.append(f"[-] Error: {str(e)}")
-            return False
+        # Refreshing the location on screen keeps it until the new
+        # data arrives, it is only redrawn if the content changed
+        if self.session is None or self.session.key != key:
+            self.clear_results()
+            self.resultsTextEdit.append("Getting air quality data...")
+        self.worker = FetchWorker(self.request_id, city, state, country)
+        self.worker.signals.finished.connect(self.location_ready)
+        self.worker.signals.error.connect(self.location_error)
+        self.thread_pool.start(self.worker)
+
+# ---------------------------- CANCEL WORKER ----------------------------- #
+    def cancel_worker(self):
+        """Drop the result of the request in flight, if any"""
+        if self.worker is not None:
+            # A worker that has not started returns at once, one that
+            # has finished is ignored by the request_id check. tryTake
+            # is not used, the pool may already have deleted a finished
+            # auto delete runnable.
+            self.worker.cancelled = True
+            self.worker = None
+
+# ---------------------------- LOCATION READY ---------------------------- #
+    def location_ready(self, request_id, key, address, data):
+        """Slot for FetchWorker.finished, runs on the GUI thread"""
+        # Ignore results of superseded requests
+        if request_id != self.request_id:
+            return
+        self.worker = None
+        self.session = location_session.LocationSession(key, address, data)
+        self.address, self.data = address, data
+        self.display()
+
+# ---------------------------- LOCATION ERROR ---------------------------- #
+    def location_error(self, request_id, message):
+        """Slot for FetchWorker.error, runs on the GUI thread"""
+        if request_id != self.request_id:
+            return
+        self.worker = None
+        # Display the error message in the results text area
+        self.clear_results()
+        self.resultsTextEdit.append(f"[-] Error: {message}")
 
 # ---------------------- GET CURRENT AQI --------------------------------- #
     def get_current_aqi(self):
-        # Clear the results text area before displaying new results
-        self.resultsTextEdit.clear()
-
-        # If the location is not found, return
-        if not self.get_location():
+        # Get the AQI data and display it once the location is ready
+        self.get_location(self.show_current_aqi)
+
+# ---------------------- SHOW CURRENT AQI -------------------------------- #
+    def show_current_aqi(self):
+        # Get the AQI data and display it, unless it is already shown
+        rendered = (
+            "aqi", self.address, forecast_diff.reading_digest(self.data))
+        if rendered == self.rendered:
             return
-
-        # Get the AQI data and display it
+        self.clear_results()
         self.get_aqi()
         self.display_aqi()
+        self.rendered = rendered
+
+# ---------------------------- CLOSE EVENT ------------------------------- #
+    def closeEvent(self, event):
+        """Save the rolling averages once when the window closes"""
+        self.save_stats()
+        super().closeEvent(event)
+
+# ---------------------------- SAVE STATS -------------------------------- #
+    def save_stats(self):
+        """Write the rolling averages snapshot if a reading was added"""
+        if not self.stats_changed:
+            return
+        try:
+            self.stats.save()
+            self.stats_changed = False
+        except OSError as e:
+            print(f"[-] Could not save {rolling_stats.STATS_SNAPSHOT}: {e}")
 
 # ---------------------- GET AQI FORECAST -------------------------------- #
     def get_aqi_forecast(self):
-        # Clear the results text area before displaying new results
-        self.resultsTextEdit.clear()
-
-        # If the location is not found, return
-        if not self.get_location():
-            return
-
         # Get the AQI forecast data and display it
-        self.display_aqi_forecast()
+        # once the location is ready
+        self.get_location(self.display_aqi_forecast)
+
+# ---------------------------- CLEAR RESULTS ----------------------------- #
+    def clear_results(self):
+        self.resultsTextEdit.clear()
+        self.rendered = None
 
 # ---------------------------- GET AQI ----------------------------------- #
     def get_aqi(self):
-        data = self.data.get("data", {})
-        self.sensor_location = data.get("city", {}).get("name", "N/A")
-        self.aqi = data.get("aqi", "N/A")
-        self.aqi_string = weather_utils.aqi_to_string(self.aqi)
-
-        iaqi = data.get("iaqi", {})
-        self.o3 = iaqi.get("o3", {}).get("v", "NA")
-        self.pm25 = iaqi.get("pm25", {}).get("v", "NA")
-        self.pm10 = iaqi.get("pm10", {}).get("v", "NA")
-        self.co = iaqi.get("co", {}).get("v", "NA")
-        self.so2 = iaqi.get("so2", {}).get("v", "NA")
-        self.no2 = iaqi.get("no2", {}).get("v", "NA")
-
-        self.dom_pol = data.get("dominentpol", "N/A")
-
-        forecast = data.get("forecast", {}).get("daily", {})
-        uvi_data = forecast.get("uvi", [{}])[0]
-        self.uvi = uvi_data.get("avg", "NA")
-        self.uvi_string = weather_utils.uvi_to_string(self.uvi)
-
-        temp = round(iaqi.get("t", {}).get("v", 0), 1)
-        self.temperature = round(((temp * 9.0)/5.0) + 32, 2)
-
-        self.humidity = iaqi.get("h", {}).get("v", "NA")
-
-        wind_speed_kph = iaqi.get("w", {}).get("v", 0)
-        self.wind_speed_mph = round(wind_speed_kph * .0621371, 1)
-
-        pressure = iaqi.get("p", {}).get("v", 0)
-        self.pressure = round(pressure * .02953, 2)
+        self.reading = air_quality.AirQualityReading.from_feed(self.data)
+        # A reading already added, e.g. a reused session, is ignored
+        if self.stats.add(self.reading):
+            self.stats_changed = True
 
 # ---------------------------- DISPLAY AQI ------------------------------- #
     def display_aqi(self):
-        result = f"\n {self.address}\n"
-        result += f" {'Sensor Location:':<15} {self.sensor_location}\n"
-        result += f"{'-'*70}\n"
-        result += f" {'AQI:':>27} {self.aqi} {self.aqi_string}\n"
-        result += f" {'Dominant Pollutant:':>27} {self.dom_pol}\n"
-        result += f" {'Ozone (O₃):':>27} {self.o3}\n"
-        result += f" {'Fine Particulates (PM25):':>27} {self.pm25}\n"
-        result += f" {'Coarse Particulates (PM10):':>27} {self.pm10}\n"
-        result += f" {'Carbon Monoxide (CO):':>27} {self.co}\n"
-        result += f" {'Sulfur Dioxide (SO₂):':>27} {self.so2}\n"
-        result += f" {'Nitrogen Dioxide (NO₂):':>27} {self.no2}\n"
-        result += f" {'UV Index:':>27} {self.uvi} {self.uvi_string}\n"
-        result += f" {'Temperature:':>27} {self.temperature}°F\n"
-        result += f" {'Humidity:':>27} {self.humidity}%\n"
-        result += f" {'Wind Speed:':>27} {self.wind_speed_mph} mph\n"
-        result += f" {'Pressure:':>27} {self.pressure} inHg\n"
+        station = self.reading.station
+        result = air_quality.format_reading(
+            self.address, self.reading, self.stats.means(station),
+            nowcast.nowcast_stats(self.stats, [station]).get(station))
 
         self.resultsTextEdit.append(result)
 
 # ---------------------- DISPLAY AQI FORECAST ---------------------------- #
     def display_aqi_forecast(self):
-        forecast = self.data.get(
-            "data", {}).get(
-            "forecast", {}).get("daily", {})
-        o3_slice = forecast.get("o3", [])
-        pm10_slice = forecast.get("pm10", [])
-        pm25_slice = forecast.get("pm25", [])
-        uvi_slice = forecast.get("uvi", [])
-
-        result = f"\n {self.address}\n"
-        result += f" {'Sensor Location:':<15} {self.data.get('data', {}).get('city', {}).get('name', 'N/A')}\n"
-        result += f"{'-'*70}\n"
-        result += f" {'o3':>15} {'pm10':>5} {'pm25':>5} {'uvi':>4}\n"
-
-        # Format the forecast data into a readable string
-        for o3, pm10, pm25, uvi in zip(o3_slice, pm10_slice, pm25_slice, uvi_slice):
-            day = o3.get('day', 'N/A')
-            o3 = o3.get('avg', 'N/A')
-            pm10 = pm10.get('avg', 'N/A')
-            pm25 = pm25.get('avg', 'N/A')
-            uvi = uvi.get('avg', 'N/A')
-
-            # For each day in the forecast, add a line with the
-            # date, o3, pm10, pm25 and uvi average
-            result += f"{day}: {o3:>4} {pm10:> 4} {pm25:>5} {uvi:>4}\n"
+        # Nothing is redrawn if the same forecast is already shown
+        rendered = (
+            "forecast", self.address, forecast_diff.forecast_digest(self.data))
+        if rendered == self.rendered:
+            return
+        self.clear_results()
+
+        sensor_location = self.data.get(
+            "data", {}).get("city", {}).get("name", "N/A")
+        # Columnar forecast aligned on day, NA where a pollutant
+        # has no forecast for that day
+        self.forecast = forecast.Forecast.from_feed(self.data)
+
+        result = forecast.format_forecast(
+            self.address, sensor_location, self.forecast)
 
         self.resultsTextEdit.append(result)
+        self.rendered = rendered
 
 
 def main():
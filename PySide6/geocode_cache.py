@@ -0,0 +1,194 @@
+"""
+    Name: geocode_cache.py
+    Author: William A Loring
+    Created: 10/18/2026
+    Purpose: Persistent TTL cache for geocode results
+    SQLite on disk with an in-process LRU tier in front of it
+"""
+
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+# SQLite file that holds the cached geocode results
+CACHE_DB = "geocode_cache.db"
+
+# How long a cached location is trusted, in seconds (30 days)
+DEFAULT_TTL = 30 * 24 * 60 * 60
+
+# Maximum number of rows kept on disk before eviction
+DEFAULT_MAX_ENTRIES = 10000
+
+# Maximum number of entries kept in the in-process LRU tier
+DEFAULT_MEMORY_ENTRIES = 256
+
+
+# ---------------------- LOCATION KEY ------------------------------------ #
+def location_key(city, state, country):
+    """
+    Normalize a (city, state, country) tuple into a cache key.
+    Case and extra whitespace are ignored so "scottsbluff ", "Scottsbluff"
+    and "SCOTTSBLUFF" share one entry.
+    """
+    parts = []
+    for part in (city, state, country):
+        part = " ".join((part or "").split()).casefold()
+        parts.append(part)
+    return "|".join(parts)
+
+
+# ---------------------- COORDINATE KEY ---------------------------------- #
+def coordinate_key(lat, lon, places=4):
+    """Normalize a latitude, longitude pair into a reverse geocode key"""
+    return f"@{round(float(lat), places)},{round(float(lon), places)}"
+
+
+class GeocodeCache:
+    """
+    Two tier cache: an OrderedDict LRU in memory backed by a SQLite table.
+    Values are stored as JSON so tuples come back as lists.
+    """
+
+    def __init__(self, path=CACHE_DB, ttl=DEFAULT_TTL,
+                 max_entries=DEFAULT_MAX_ENTRIES,
+                 memory_entries=DEFAULT_MEMORY_ENTRIES,
+                 table="geocode"):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.memory_entries = memory_entries
+        self.table = table
+
+        # key: (expires, value)
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = None
+
+# ---------------------- CONNECTION -------------------------------------- #
+    def _connect(self):
+        """Open the SQLite database on first use"""
+        if self._conn is None:
+            # GUI front ends look up locations from worker threads,
+            # all access is serialized by self._lock
+            self._conn = sqlite3.connect(
+                self.path, check_same_thread=False)
+            self._conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {self.table} ("
+                "key TEXT PRIMARY KEY, "
+                "value TEXT NOT NULL, "
+                "expires REAL NOT NULL, "
+                "accessed REAL NOT NULL)"
+            )
+            self._conn.execute(
+                f"CREATE INDEX IF NOT EXISTS {self.table}_accessed "
+                f"ON {self.table} (accessed)"
+            )
+            self._conn.commit()
+        return self._conn
+
+# ---------------------- MEMORY TIER ------------------------------------- #
+    def _remember(self, key, expires, value):
+        """Add an entry to the LRU tier, dropping the least recently used"""
+        self._memory[key] = (expires, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+# ---------------------- GET --------------------------------------------- #
+    def get(self, key):
+        """
+        Return the cached value for key, or None if missing or expired.
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                expires, value = entry
+                if expires > now:
+                    self._memory.move_to_end(key)
+                    return value
+                del self._memory[key]
+
+            try:
+                conn = self._connect()
+                row = conn.execute(
+                    f"SELECT value, expires FROM {self.table} WHERE key = ?",
+                    (key,)
+                ).fetchone()
+                if row is None:
+                    return None
+                value, expires = json.loads(row[0]), row[1]
+                if expires <= now:
+                    conn.execute(
+                        f"DELETE FROM {self.table} WHERE key = ?", (key,))
+                    conn.commit()
+                    return None
+                conn.execute(
+                    f"UPDATE {self.table} SET accessed = ? WHERE key = ?",
+                    (now, key)
+                )
+                conn.commit()
+            except sqlite3.Error as e:
+                # A broken cache must never break a lookup
+                print(f"[-] Geocode cache unavailable: {str(e)}")
+                return None
+
+            self._remember(key, expires, value)
+            return value
+
+# ---------------------- SET --------------------------------------------- #
+    def set(self, key, value, ttl=None):
+        """Store value under key in both tiers"""
+        now = time.time()
+        expires = now + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._remember(key, expires, value)
+            try:
+                conn = self._connect()
+                conn.execute(
+                    f"INSERT OR REPLACE INTO {self.table} "
+                    "(key, value, expires, accessed) VALUES (?, ?, ?, ?)",
+                    (key, json.dumps(value), expires, now)
+                )
+                self._evict(conn, now)
+                conn.commit()
+            except sqlite3.Error as e:
+                print(f"[-] Geocode cache unavailable: {str(e)}")
+
+# ---------------------- EVICT ------------------------------------------- #
+    def _evict(self, conn, now):
+        """Drop expired rows, then the least recently used over the limit"""
+        conn.execute(
+            f"DELETE FROM {self.table} WHERE expires <= ?", (now,))
+        count = conn.execute(
+            f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+        if count > self.max_entries:
+            conn.execute(
+                f"DELETE FROM {self.table} WHERE key IN ("
+                f"SELECT key FROM {self.table} "
+                "ORDER BY accessed LIMIT ?)",
+                (count - self.max_entries,)
+            )
+
+# ---------------------- CLEAR ------------------------------------------- #
+    def clear(self):
+        """Remove every cached entry"""
+        with self._lock:
+            self._memory.clear()
+            conn = self._connect()
+            conn.execute(f"DELETE FROM {self.table}")
+            conn.commit()
+
+# ---------------------- CLOSE ------------------------------------------- #
+    def close(self):
+        """Close the SQLite connection"""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+# Shared cache used by geocode_geopy
+CACHE = GeocodeCache()
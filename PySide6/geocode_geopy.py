@@ -6,8 +6,12 @@
 """
 
 # pip install geopy
-from geopy.geocoders import Nominatim
 from geopy.exc import GeocoderTimedOut, GeocoderUnavailable
+from geopy.location import Location
+import geocode_cache
+import gazetteer
+import reverse_geocoder
+import geocode_service
 
 # For testing
 # LAT = 41.8666
@@ -20,10 +24,57 @@ def main():
     # reverse_geocode(LAT, LON)
 
 
+# ---------------------- LOOKUP ------------------------------------------ #
+def lookup(city, state, country, query=None,
+           priority=geocode_service.INTERACTIVE):
+    """
+    Geocode a location through the persistent geocode cache,
+    then the offline gazetteer, then Nominatim.
+    Args:
+        city (str): The name of the city.
+        state (str): The name of the state.
+        country (str): The name of the country.
+        query (dict or str): Optional Nominatim query to send on a miss,
+            defaults to a structured city, state, country query.
+        priority (int): geocode_service.INTERACTIVE, or BATCH for
+            background jobs that should yield to the GUIs.
+    Returns:
+        tuple: latitude, longitude, and address of the location.
+    Raises:
+        ValueError: If the location is not found.
+    """
+    key = geocode_cache.location_key(city, state, country)
+    cached = geocode_cache.CACHE.get(key)
+    if cached is not None:
+        return tuple(cached)
+
+    # Offline gazetteer, no network and no rate limit
+    local = gazetteer.GAZETTEER.lookup(city, state, country)
+    if local is not None:
+        return local
+
+    if query is None:
+        query = {
+            "city": city,
+            "state": state,
+            "country": country
+        }
+
+    # Cache miss, ask Nominatim through the shared rate limited service
+    loc = geocode_service.SERVICE.geocode(query, priority)
+    if not loc:
+        raise ValueError("Location not found")
+
+    result = (loc.latitude, loc.longitude, loc.address)
+    geocode_cache.CACHE.set(key, result)
+    return result
+
+
 # ---------------------- GEOCODE ARG ------------------------------------- #
 def geocode_arg(city, state, country):
     """
-    Geocodes given location information using the Nominatim geocode service.
+    Geocodes given location information using the offline gazetteer,
+    falling back to the Nominatim geocode service.
     Args:
         city (str): The name of the city.
         state (str): The name of the state.
@@ -36,19 +87,8 @@ def geocode_arg(city, state, country):
         Exception: If the geocoding service is unavailable.
     """
     try:
-        # Create geolocator object with Nominatim geocode service
-        geolocator = Nominatim(user_agent="location_practice")
-        # Create location dictionary for request
-        location = {
-            "city": city,
-            "state": state,
-            "country": country
-        }
-        loc = geolocator.geocode(location)
-        if loc:
-            return (loc.latitude, loc.longitude, loc.address)
-        else:
-            raise ValueError("Location not found")
+        # Cached Nominatim geocode of the location
+        return lookup(city, state, country)
 
     except (GeocoderTimedOut, GeocoderUnavailable) as e:
         raise Exception(f"Geocoding service unavailable: {str(e)}")
@@ -68,27 +108,14 @@ def geocode():
         Exception: If the geocoding service is unavailable.
     """
     try:
-        # Create geolocator object with Nominatim geocode service
-        # Nominatim is a free geolocater that uses openstreetmaps.org
-        geolocator = Nominatim(user_agent="location_practice")
-
         # Get location input from user
         city = input("Enter city: ")
         state = input("Enter state: ")
         country = input("Enter country: ")
 
-        # Create location dictionary for request
-        location = {
-            "city": city,
-            "state": state,
-            "country": country
-        }
-
-        loc = geolocator.geocode(location)
-        if location:
-            return loc.latitude, loc.longitude, loc.address
-        else:
-            raise ValueError("Location not found")
+        # Nominatim is a free geolocater that uses openstreetmaps.org
+        # Repeat locations are answered from the geocode cache
+        return lookup(city, state, country)
 
         # For testing purposes
         # print(geo_location.raw)
@@ -114,15 +141,32 @@ def reverse_geocode(lat, lon):
     - Exception: If an error occurs while reverse geocoding.
     """
     try:
-        # Create geolocator object
-        geolocator = Nominatim(user_agent="location_practice")
+        key = geocode_cache.coordinate_key(lat, lon)
+        cached = geocode_cache.CACHE.get(key)
+        if cached is not None:
+            latitude, longitude, address, raw = cached
+            return Location(address, (latitude, longitude), raw)
+
+        # Offline nearest town, no network and no rate limit, None if
+        # no town is close enough to be a meaningful address
+        local = reverse_geocoder.REVERSE_GEOCODER.lookup(lat, lon)
+        if local is not None:
+            address, distance_km = local
+            return Location(address, (lat, lon), {
+                "display_name": address, "distance_km": distance_km})
 
         # Create location tuple
         location = (lat, lon)
 
-        # Get address with resolution of town
-        address = geolocator.reverse(location, zoom=10)
+        # Get address with resolution of town, through the shared
+        # rate limited service
+        address = geocode_service.SERVICE.reverse(location, zoom=10)
 
+        if address:
+            geocode_cache.CACHE.set(key, [
+                address.latitude, address.longitude,
+                address.address, address.raw
+            ])
         return address
     except:
         print("An error occured while reverse geocoding.")
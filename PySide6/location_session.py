@@ -0,0 +1,37 @@
+"""
+    Name: location_session.py
+    Author: William A Loring
+    Created: 10/18/2026
+    Purpose: Hold the fetched feed for the current location so the
+    current AQI and forecast views share one geocode and one request
+"""
+
+import time
+
+# Seconds before a session's feed is fetched again
+MAX_AGE = 10 * 60
+
+
+class LocationSession:
+    """The location inputs, geocoded address, and feed fetched for them"""
+
+    def __init__(self, key, address, data, fetched=None):
+        # (city, state, country) as entered by the user
+        self.key = key
+        self.address = address
+        # AQICN feed as a Python dictionary, includes the forecast
+        self.data = data
+        self.fetched = time.time() if fetched is None else fetched
+
+# ---------------------- AGE --------------------------------------------- #
+    def age(self):
+        """Seconds since the feed was fetched"""
+        return time.time() - self.fetched
+
+# ---------------------- MATCHES ----------------------------------------- #
+    def matches(self, key, max_age=MAX_AGE):
+        """
+        True if the session can be reused for key:
+        the inputs are unchanged and the feed is younger than max_age.
+        """
+        return key == self.key and self.age() < max_age
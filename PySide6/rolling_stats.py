@@ -0,0 +1,291 @@
+"""
+    Name: rolling_stats.py
+    Author: William A Loring
+    Created: 10/18/2026
+    Purpose: Rolling window mean, min, max and daily maxima per station
+    and pollutant
+    Every update and query is O(1) amortized, nothing is rescanned
+"""
+
+import json
+import os
+from collections import deque
+from datetime import datetime
+# pip install numpy
+import numpy as np
+
+STATS_SNAPSHOT = "rolling_stats.npz"
+
+# Window length in seconds
+DEFAULT_WINDOW = 24 * 60 * 60
+
+# Readings a window holds before its ring buffer grows,
+# one day of readings every 15 minutes
+DEFAULT_CAPACITY = 96
+
+# Days of daily maxima kept per station and field
+DEFAULT_DAYS = 7
+
+# Reading fields tracked by default
+DEFAULT_FIELDS = ("aqi", "o3", "pm25", "pm10", "co", "so2", "no2")
+
+
+class RollingWindow:
+    """
+    Time based window over a ring buffer of (time, value).
+    A running sum gives the mean, monotonic deques of sequence numbers
+    give the min and max: each value enters and leaves each deque once.
+    """
+
+    __slots__ = ("seconds", "times", "values", "first", "next",
+                 "total", "lows", "highs")
+
+    def __init__(self, seconds=DEFAULT_WINDOW, capacity=DEFAULT_CAPACITY):
+        self.seconds = seconds
+        self.times = np.empty(capacity)
+        self.values = np.empty(capacity)
+        # Sequence numbers of the oldest value and of the next value,
+        # a sequence number s lives at index s % capacity
+        self.first = 0
+        self.next = 0
+        self.total = 0.0
+        # Sequence numbers, values increasing in lows, decreasing in highs
+        self.lows = deque()
+        self.highs = deque()
+
+    def __len__(self):
+        return self.next - self.first
+
+# ---------------------- AT ---------------------------------------------- #
+    def _at(self, sequence):
+        return self.values[sequence % len(self.values)]
+
+# ---------------------- GROW -------------------------------------------- #
+    def _grow(self):
+        """Double the ring buffer, keeping sequence numbers valid"""
+        capacity = len(self.values)
+        sequences = np.arange(self.first, self.next)
+        times = self.times[sequences % capacity]
+        values = self.values[sequences % capacity]
+        self.times = np.empty(capacity * 2)
+        self.values = np.empty(capacity * 2)
+        self.times[sequences % (capacity * 2)] = times
+        self.values[sequences % (capacity * 2)] = values
+        # Re-add from scratch so rounding error does not accumulate
+        self.total = float(values.sum())
+
+# ---------------------- PUSH -------------------------------------------- #
+    def push(self, when, value):
+        """
+        Add a value observed at time when. Observations no newer than
+        the last one are ignored, repeat polls see the same observation.
+        Returns:
+            bool: True if the value was added.
+        """
+        when, value = float(when), float(value)
+        if len(self) and when <= self.times[(self.next - 1) % len(self.times)]:
+            return False
+        self.expire(when)
+        if len(self) == len(self.values):
+            self._grow()
+
+        index = self.next % len(self.values)
+        self.times[index] = when
+        self.values[index] = value
+        self.total += value
+        while self.lows and self._at(self.lows[-1]) >= value:
+            self.lows.pop()
+        self.lows.append(self.next)
+        while self.highs and self._at(self.highs[-1]) <= value:
+            self.highs.pop()
+        self.highs.append(self.next)
+        self.next += 1
+        return True
+
+# ---------------------- EXPIRE ------------------------------------------ #
+    def expire(self, now):
+        """Drop values older than the window at time now"""
+        start = now - self.seconds
+        while len(self) and self.times[self.first % len(self.times)] <= start:
+            self.total -= self._at(self.first)
+            if self.lows[0] == self.first:
+                self.lows.popleft()
+            if self.highs[0] == self.first:
+                self.highs.popleft()
+            self.first += 1
+        if not len(self):
+            self.total = 0.0
+
+# ---------------------- STATS ------------------------------------------- #
+    def mean(self):
+        return float(self.total / len(self)) if len(self) else None
+
+    def min(self):
+        return float(self._at(self.lows[0])) if self.lows else None
+
+    def max(self):
+        return float(self._at(self.highs[0])) if self.highs else None
+
+# ---------------------- ITEMS ------------------------------------------- #
+    def items(self):
+        """(times, values) arrays, oldest first"""
+        sequences = np.arange(self.first, self.next) % len(self.values)
+        return self.times[sequences], self.values[sequences]
+
+
+class RollingStats:
+    """RollingWindows keyed by (station, field), fed AirQualityReadings"""
+
+    def __init__(self, seconds=DEFAULT_WINDOW, fields=DEFAULT_FIELDS,
+                 days=DEFAULT_DAYS):
+        self.seconds = seconds
+        self.fields = fields
+        self.days = days
+        # (station, field): RollingWindow
+        self.windows = {}
+        # (station, field): {"YYYY-MM-DD": max}, oldest day first
+        self.daily = {}
+
+    def __contains__(self, station):
+        return any((station, field) in self.windows for field in self.fields)
+
+# ---------------------- ADD --------------------------------------------- #
+    def add(self, reading):
+        """
+        Add every tracked value of a reading that has a time.
+        Returns:
+            bool: True if any value was new, False for a repeat.
+        """
+        if reading.station is None or reading.time is None:
+            return False
+        added = False
+        day = datetime.fromtimestamp(reading.time).strftime("%Y-%m-%d")
+        for field in self.fields:
+            value = getattr(reading, field)
+            if value is None or value != value:
+                continue
+            key = (reading.station, field)
+            window = self.windows.get(key)
+            if window is None:
+                window = self.windows[key] = RollingWindow(self.seconds)
+            if window.push(reading.time, value):
+                added = True
+            self._daily_max(key, day, value)
+        return added
+
+# ---------------------- DAILY MAX --------------------------------------- #
+    def _daily_max(self, key, day, value):
+        maxima = self.daily.get(key)
+        if maxima is None:
+            maxima = self.daily[key] = {}
+        if day in maxima:
+            maxima[day] = max(maxima[day], value)
+            return
+        maxima[day] = value
+        if len(maxima) > self.days:
+            del maxima[min(maxima)]
+
+    def extend(self, readings):
+        """Add readings, oldest first"""
+        for reading in readings:
+            self.add(reading)
+
+# ---------------------- STATS ------------------------------------------- #
+    def stats(self, station, field, now=None):
+        """
+        Return {"mean", "min", "max", "count"} of a station's field over
+        the window ending at now, default its latest value, or None.
+        """
+        window = self.windows.get((station, field))
+        if window is None:
+            return None
+        if now is not None:
+            window.expire(now)
+        if not len(window):
+            return None
+        return {
+            "mean": window.mean(),
+            "min": window.min(),
+            "max": window.max(),
+            "count": len(window),
+        }
+
+    def series(self, station, field, start=None, end=None):
+        """
+        Return (times, values) NumPy arrays of a station's field within
+        the window, between start and end inclusive, oldest first.
+        Same contract as ReadingsStore.series, without any I/O.
+        """
+        window = self.windows.get((station, field))
+        if window is None:
+            return np.empty(0), np.empty(0)
+        times, values = window.items()
+        keep = np.ones(len(times), dtype=bool)
+        if start is not None:
+            keep &= times >= start
+        if end is not None:
+            keep &= times <= end
+        return times[keep], values[keep]
+
+    def daily_max(self, station, field):
+        """{"YYYY-MM-DD": max} of the last days of a station's field"""
+        return dict(sorted(self.daily.get((station, field), {}).items()))
+
+    def means(self, station, now=None):
+        """{field: window mean} of every tracked field of a station"""
+        means = {}
+        for field in self.fields:
+            stats = self.stats(station, field, now)
+            if stats is not None:
+                means[field] = stats["mean"]
+        return means
+
+# ---------------------- SAVE -------------------------------------------- #
+    def save(self, path=STATS_SNAPSHOT):
+        """Snapshot every window to a .npz file, replaced atomically"""
+        keys, times, values, lengths = [], [], [], []
+        for key, window in self.windows.items():
+            window_times, window_values = window.items()
+            keys.append(list(key))
+            times.append(window_times)
+            values.append(window_values)
+            lengths.append(len(window_times))
+        temp = f"{path}.tmp"
+        with open(temp, "wb") as file:
+            np.savez(
+                file,
+                seconds=self.seconds,
+                keys=json.dumps(keys),
+                daily=json.dumps(
+                    [[list(key), maxima]
+                     for key, maxima in self.daily.items()]),
+                lengths=np.array(lengths, dtype=np.int64),
+                times=np.concatenate(times) if times else np.empty(0),
+                values=np.concatenate(values) if values else np.empty(0),
+            )
+        os.replace(temp, path)
+
+# ---------------------- LOAD -------------------------------------------- #
+    @classmethod
+    def load(cls, path=STATS_SNAPSHOT, fields=DEFAULT_FIELDS):
+        """Read a snapshot written by save(), empty if there is none"""
+        try:
+            saved = np.load(path, allow_pickle=False)
+        except (OSError, ValueError):
+            return cls(fields=fields)
+        with saved:
+            stats = cls(float(saved["seconds"]), fields)
+            times = saved["times"]
+            values = saved["values"]
+            start = 0
+            for key, length in zip(json.loads(str(saved["keys"])),
+                                   saved["lengths"]):
+                window = stats.windows[tuple(key)] = RollingWindow(
+                    stats.seconds, max(DEFAULT_CAPACITY, int(length)))
+                for when, value in zip(times[start:start + length],
+                                       values[start:start + length]):
+                    window.push(when, value)
+                start += length
+            for key, maxima in json.loads(str(saved["daily"])):
+                stats.daily[tuple(key)] = maxima
+        return stats
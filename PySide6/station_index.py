@@ -0,0 +1,141 @@
+"""
+    Name: station_index.py
+    Author: William A Loring
+    Created: 10/18/2026
+    Purpose: Known AQICN stations and their last feed response
+    A location within a few km of a station with a fresh reading is
+    answered locally instead of through the geo feed
+"""
+
+import threading
+import time
+import feed_cache
+import spatial_index
+
+STATION_INDEX = "stations.npz"
+
+# A fresh station this close answers for a location
+DEFAULT_MAX_KM = 5.0
+
+
+# ---------------------- STATION LOCATION -------------------------------- #
+def station_location(data):
+    """
+    Return (idx, lat, lng) of the station of a feed response,
+    or None if the feed does not have them.
+    """
+    feed = (data or {}).get("data") or {}
+    geo = (feed.get("city") or {}).get("geo") or []
+    try:
+        return int(feed["idx"]), float(geo[0]), float(geo[1])
+    except (KeyError, IndexError, TypeError, ValueError):
+        return None
+
+
+class StationIndex:
+    """
+    Spatial index of stations keyed by station idx. Each value is
+    [fresh_until, feed response] so freshness survives a restart.
+    """
+
+    def __init__(self, path=STATION_INDEX, max_km=DEFAULT_MAX_KM,
+                 cache=feed_cache.FEED_CACHE):
+        self.path = path
+        self.max_km = max_km
+        self.cache = cache
+        self._dirty = False
+        self._lock = threading.Lock()
+        try:
+            self.index = spatial_index.SpatialIndex.load(path)
+        except (OSError, ValueError, KeyError):
+            # No saved index yet, or one we cannot read
+            self.index = spatial_index.SpatialIndex()
+
+    def __len__(self):
+        return len(self.index)
+
+# ---------------------- ADD FEED ---------------------------------------- #
+    def add_feed(self, data):
+        """Insert or refresh the station of a successful feed response"""
+        if not data or data.get("status") != "ok":
+            return
+        station = station_location(data)
+        if station is None:
+            return
+        idx, lat, lng = station
+        fresh_until = self.cache.fresh_until(data, time.time())
+        self.index.insert(idx, lat, lng, [fresh_until, data])
+        self._dirty = True
+
+# ---------------------- NEARBY ------------------------------------------ #
+    def nearby(self, lat, lng, max_km=None):
+        """
+        Return the feed of the nearest station with a fresh reading
+        within max_km of lat, lng, or None.
+        """
+        if max_km is None:
+            max_km = self.max_km
+        now = time.time()
+        for idx, km, (fresh_until, data) in self.index.radius(
+                lat, lng, max_km):
+            if now < fresh_until:
+                return data
+        return None
+
+# ---------------------- FRESH ------------------------------------------- #
+    def fresh(self, idx):
+        """Return the last feed of station idx if still fresh, else None"""
+        entry = self.index.get(idx)
+        if entry is None:
+            return None
+        fresh_until, data = entry[2]
+        return data if time.time() < fresh_until else None
+
+# ---------------------- FETCH STATION ----------------------------------- #
+    def fetch_station(self, idx, fetch_station_feed):
+        """
+        Return the feed of station idx, fresh from the index or from
+        fetch_station_feed(idx), which returns None if unavailable.
+        """
+        data = self.fresh(idx)
+        if data is not None:
+            return data
+        data = fetch_station_feed(idx)
+        self.add_feed(data)
+        return data
+
+# ---------------------- FETCH ------------------------------------------- #
+    def fetch(self, lat, lng, fetch_feed):
+        """
+        Return the feed for lat, lng from a nearby fresh station,
+        else through the feed cache. Same contract as FeedCache.fetch.
+        Only responses fetched from the API are indexed, a stale
+        response served by the cache would be indexed as fresh.
+        """
+        data = self.nearby(lat, lng)
+        if data is not None:
+            return data
+
+        def fetch_and_index(lat, lng):
+            data = fetch_feed(lat, lng)
+            self.add_feed(data)
+            return data
+
+        return self.cache.fetch(lat, lng, fetch_and_index)
+
+# ---------------------- SAVE -------------------------------------------- #
+    def save(self):
+        """Persist the index if stations were added since the last save"""
+        with self._lock:
+            if not self._dirty:
+                return
+            self._dirty = False
+            try:
+                self.index.save(self.path)
+            except OSError as e:
+                self._dirty = True
+                print(f"[-] Could not save {self.path}: {e}")
+
+
+# Shared index used by the CLI, Tkinter and PySide6 front ends
+STATIONS = StationIndex()
@@ -2,9 +2,11 @@
     Name: weather_utils.py
     Author: William A Loring
     Created: 06/20/2021
-    Purpose: 
+    Purpose: Weather and air quality display helpers
 """
 import datetime
+# pip install numpy
+import numpy as np
 
 
 # ----------------------- ASCII DECORATED TITLE --------------------------- #
@@ -27,40 +29,72 @@ def title(statement):
     return result
 
 
+# --------------------------- CATEGORY TABLES ---------------------------- #
+# Upper bound of each AQI category, inclusive
+AQI_BREAKPOINTS = np.array([50, 100, 150, 200, 300])
+# Label of each category code, the last code is for missing values
+AQI_LABELS = (
+    "Good",
+    "Moderate",
+    "Unhealthy for Sensitive Groups",
+    "Unhealthy",
+    "Very Unhealthy",
+    "Hazardous",
+    "None",
+)
+
+# Lower bound of each UV index category above Low, inclusive
+UVI_BREAKPOINTS = np.array([3, 6, 8, 11])
+UVI_LABELS = (
+    "Low",
+    "Moderate",
+    "High",
+    "Very High",
+    "Extreme",
+    "None",
+)
+
+
+# --------------------------- AQI CATEGORIES ----------------------------- #
+def aqi_categories(aqi):
+    """
+        Categorize an array or list of AQI values in one call
+        returns a uint8 array of codes, look up labels in AQI_LABELS
+        None and NaN are coded as "None"
+    """
+    aqi = np.asarray(aqi, dtype=float)
+    codes = np.searchsorted(AQI_BREAKPOINTS, aqi, side="left")
+    codes = np.where(np.isnan(aqi), len(AQI_LABELS) - 1, codes)
+    return codes.astype(np.uint8)
+
+
+# --------------------------- UVI CATEGORIES ----------------------------- #
+def uvi_categories(uvi):
+    """
+        Categorize an array or list of UV index values in one call
+        returns a uint8 array of codes, look up labels in UVI_LABELS
+        None, NaN and negative values are coded as "None"
+    """
+    uvi = np.asarray(uvi, dtype=float)
+    codes = np.searchsorted(UVI_BREAKPOINTS, uvi, side="right")
+    codes = np.where(np.isnan(uvi) | (uvi < 0), len(UVI_LABELS) - 1, codes)
+    return codes.astype(np.uint8)
+
+
+# --------------------------- CATEGORY LABELS ---------------------------- #
+def category_labels(codes, labels):
+    """Return an array of label strings for an array of category codes"""
+    return np.asarray(labels)[codes]
+
+
 # --------------------------- AQI TO STRING ------------------------------ #
 def aqi_to_string(aqi):
-    aqi_string = "None"
-    if aqi <= 50:
-        aqi_string = "Good"
-    elif aqi <= 100:
-        aqi_string = "Moderate"
-    elif aqi <= 150:
-        aqi_string = "Unhealthy for Sensitive Groups"
-    elif aqi <= 200:
-        aqi_string = "Unhealthy"
-    elif aqi <= 300:
-        aqi_string = "Very Unhealthy"
-    elif aqi > 301:
-        aqi_string = "Hazardous"
-    else:
-        aqi_string = "None"
-    return aqi_string
+    return AQI_LABELS[aqi_categories(aqi).item()]
 
 
 # --------------------------- UV INDEX STRING ------------------------------#
 def uvi_to_string(uvi):
-    if uvi >= 11:
-        uvi_string = "Extreme"
-    elif uvi >= 8:
-        uvi_string = "Very High"
-    elif uvi >= 6:
-        uvi_string = "High"
-    elif uvi >= 3:
-        uvi_string = "Moderate"
-    elif uvi >= 0:
-        uvi_string = "Low"
-
-    return uvi_string
+    return UVI_LABELS[uvi_categories(uvi).item()]
 
 
 # ------------------- CONVERT TO CELSIUS TO FAHRENHEIT ------------------- #
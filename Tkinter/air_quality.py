@@ -0,0 +1,205 @@
+"""
+    Name: air_quality.py
+    Author: William A Loring
+    Created: 10/18/2026
+    Purpose: Compact air quality reading parsed in one pass
+    from the AQICN feed JSON
+"""
+
+import feed_cache
+import weather_utils
+
+# Pollutants reported in the iaqi section of the feed
+POLLUTANTS = ("o3", "pm25", "pm10", "co", "so2", "no2")
+
+
+# ---------------------- VALUE OR NA ------------------------------------- #
+def value_or_na(value, suffix=""):
+    """Format a reading value for display, NA if it is missing"""
+    if value is None:
+        return "NA"
+    return f"{value}{suffix}"
+
+
+# ---------------------- FORMAT READING ---------------------------------- #
+def format_reading(address, reading, averages=None, nowcast=None):
+    """
+    Return the display text for an AirQualityReading
+    Args:
+        averages (dict): Optional {field: 24 hour mean} shown next to
+            the current aqi and pollutant values.
+        nowcast (dict): Optional {field: NowCast AQI} shown the same way.
+    """
+    na = value_or_na
+    averages = averages or {}
+    nowcast = nowcast or {}
+
+    def avg(field):
+        extra = []
+        if nowcast.get(field) is not None:
+            extra.append(f"NowCast {nowcast[field]:.0f}")
+        if averages.get(field) is not None:
+            extra.append(f"24h avg {round(averages[field], 1):g}")
+        return f"  ({', '.join(extra)})" if extra else ""
+
+    result = f"\n {address}\n"
+    result += f" {'Sensor Location:':<15} {na(reading.sensor_location)}\n"
+    result += f"{'-'*70}\n"
+    result += f" {'AQI:':>27} {na(reading.aqi)} {reading.aqi_string}" \
+        f"{avg('aqi')}\n"
+    result += f" {'Dominant Pollutant:':>27} {na(reading.dom_pol)}\n"
+    result += f" {'Ozone (O₃):':>27} {na(reading.o3)}{avg('o3')}\n"
+    result += f" {'Fine Particulates (PM25):':>27} {na(reading.pm25)}" \
+        f"{avg('pm25')}\n"
+    result += f" {'Coarse Particulates (PM10):':>27} {na(reading.pm10)}" \
+        f"{avg('pm10')}\n"
+    result += f" {'Carbon Monoxide (CO):':>27} {na(reading.co)}{avg('co')}\n"
+    result += f" {'Sulfur Dioxide (SO₂):':>27} {na(reading.so2)}" \
+        f"{avg('so2')}\n"
+    result += f" {'Nitrogen Dioxide (NO₂):':>27} {na(reading.no2)}" \
+        f"{avg('no2')}\n"
+    result += f" {'UV Index:':>27} {na(reading.uvi)} {reading.uvi_string}\n"
+    result += f" {'Temperature:':>27} {na(reading.temperature_f, '°F')}\n"
+    result += f" {'Humidity:':>27} {na(reading.humidity, '%')}\n"
+    result += f" {'Wind Speed:':>27} {na(reading.wind_speed_mph, ' mph')}\n"
+    result += f" {'Pressure:':>27} {na(reading.pressure_inhg, ' inHg')}\n"
+    return result
+
+
+class AirQualityReading:
+    """
+    One station reading. Missing values are None.
+    __slots__ keeps each reading small, there is no instance __dict__.
+    Temperature is stored in °C, wind speed in m/s and pressure in hPa
+    as the feed reports them, converted on demand.
+    """
+
+    __slots__ = (
+        "station", "sensor_location", "lat", "lng", "time",
+        "aqi", "dom_pol",
+        "o3", "pm25", "pm10", "co", "so2", "no2",
+        "uvi", "temperature_c", "humidity", "wind_speed_ms", "pressure_hpa",
+    )
+
+    def __init__(self, station=None, sensor_location=None, lat=None,
+                 lng=None, time=None, aqi=None, dom_pol=None,
+                 o3=None, pm25=None, pm10=None, co=None, so2=None, no2=None,
+                 uvi=None, temperature_c=None, humidity=None,
+                 wind_speed_ms=None, pressure_hpa=None):
+        # AQICN station idx
+        self.station = station
+        self.sensor_location = sensor_location
+        self.lat = lat
+        self.lng = lng
+        # Observation time as a Unix timestamp
+        self.time = time
+        self.aqi = aqi
+        self.dom_pol = dom_pol
+        self.o3 = o3
+        self.pm25 = pm25
+        self.pm10 = pm10
+        self.co = co
+        self.so2 = so2
+        self.no2 = no2
+        self.uvi = uvi
+        self.temperature_c = temperature_c
+        self.humidity = humidity
+        self.wind_speed_ms = wind_speed_ms
+        self.pressure_hpa = pressure_hpa
+
+    def __repr__(self):
+        return (f"AirQualityReading(station={self.station!r}, "
+                f"time={self.time!r}, aqi={self.aqi!r})")
+
+# ---------------------- FROM FEED --------------------------------------- #
+    @classmethod
+    def from_feed(cls, data):
+        """
+        Parse an AQICN feed dictionary in a single pass.
+        Accepts the whole response or just its "data" section.
+        """
+        data = data.get("data", data)
+        if not isinstance(data, dict):
+            return cls()
+        iaqi = data.get("iaqi") or {}
+        city = data.get("city") or {}
+        geo = city.get("geo") or (None, None)
+
+        # One lookup per iaqi entry
+        values = {}
+        for name, entry in iaqi.items():
+            if isinstance(entry, dict):
+                values[name] = entry.get("v")
+
+        uvi = None
+        daily = (data.get("forecast") or {}).get("daily") or {}
+        uvi_days = daily.get("uvi")
+        if uvi_days:
+            uvi = uvi_days[0].get("avg")
+
+        # Stations report "-" when the AQI is not available
+        aqi = data.get("aqi")
+        if not isinstance(aqi, (int, float)):
+            aqi = None
+
+        return cls(
+            station=data.get("idx"),
+            sensor_location=city.get("name"),
+            lat=geo[0],
+            lng=geo[1],
+            time=feed_cache.observed_time({"data": data}),
+            aqi=aqi,
+            dom_pol=data.get("dominentpol") or None,
+            o3=values.get("o3"),
+            pm25=values.get("pm25"),
+            pm10=values.get("pm10"),
+            co=values.get("co"),
+            so2=values.get("so2"),
+            no2=values.get("no2"),
+            uvi=uvi,
+            temperature_c=values.get("t"),
+            humidity=values.get("h"),
+            wind_speed_ms=values.get("w"),
+            pressure_hpa=values.get("p"),
+        )
+
+# ---------------------- CONVERSIONS ------------------------------------- #
+    @property
+    def temperature_f(self):
+        """Temperature in °F"""
+        if self.temperature_c is None:
+            return None
+        return weather_utils.celsius_to_fahrenheit(self.temperature_c)
+
+    @property
+    def wind_speed_mph(self):
+        """Wind speed in mph"""
+        if self.wind_speed_ms is None:
+            return None
+        return round(self.wind_speed_ms * 2.23694, 1)
+
+    @property
+    def pressure_inhg(self):
+        """Barometric pressure in inHg"""
+        if self.pressure_hpa is None:
+            return None
+        return round(self.pressure_hpa * .02953, 2)
+
+    @property
+    def aqi_string(self):
+        """AQI category, NA if there is no AQI"""
+        if self.aqi is None:
+            return "NA"
+        return weather_utils.aqi_to_string(self.aqi)
+
+    @property
+    def uvi_string(self):
+        """UV index category, NA if there is no UV index"""
+        if self.uvi is None:
+            return "NA"
+        return weather_utils.uvi_to_string(self.uvi)
+
+# ---------------------- AS DICT ----------------------------------------- #
+    def as_dict(self):
+        """Return the reading as a dictionary of slot name: value"""
+        return {name: getattr(self, name) for name in self.__slots__}
@@ -6,15 +6,58 @@
     Claude AI used as a code helper
 """
 
-# pip install requests
-import requests
+from concurrent.futures import ThreadPoolExecutor
 import tkinter as tk
 from tkinter import ttk, scrolledtext
-import api_key
 from geocode_geopy import geocode_arg
-import weather_utils
-
-AQICN_ENDPOINT = 'https://api.waqi.info/feed/geo:'
+import air_quality
+import forecast
+import forecast_diff
+import nowcast
+import rolling_stats
+import station_index
+import station_map
+import http_client
+import location_session
+
+
+# Number of threads for geocode and AQICN requests
+MAX_WORKERS = 4
+
+# How often the Tk main loop checks for finished requests, milliseconds
+POLL_MS = 50
+
+
+# ---------------------- GEOCODE ----------------------------------------- #
+def geocode(city, state, country):
+    """Return (lat, lng, address), raises if the location is not found"""
+    # geocode_arg returns None when the location is not found
+    location = geocode_arg(city, state, country)
+    if location is None:
+        raise ValueError("Location not found")
+    return location
+
+
+# ---------------------- FETCH LOCATION ---------------------------------- #
+def fetch_location(city, state, country):
+    """
+    Geocode a location and fetch its AQICN feed.
+    Runs on a worker thread, never touches Tk widgets.
+    Returns:
+        tuple: (address, data) with the feed as a Python dictionary.
+    Raises:
+        Exception: If the location is not found or the API is unavailable.
+    """
+    # A location seen before is fetched by its station idx,
+    # else geocoded and answered by a known station nearby
+    # with a fresh reading, else through the feed cache
+    address, data = station_map.STATION_MAP.fetch(
+        city, state, country, geocode,
+        http_client.fetch_feed, http_client.fetch_station_feed)
+    if data is None:
+        raise ConnectionError("API unavailable. Please try again.")
+    station_index.STATIONS.save()
+    return address, data
 
 
 class AQICNGui:
@@ -24,16 +67,38 @@ class AQICNGui:
         master.geometry("600x475")
         master.iconbitmap("edit_clear.ico")
 
+        # Network work runs on a thread pool so the window never freezes
+        self.executor = ThreadPoolExecutor(max_workers=MAX_WORKERS)
+        # (city, state, country): Future of requests still running
+        self.in_flight = {}
+        # Only the most recent click is rendered
+        self.request_id = 0
+        # Feed shared by the current AQI and forecast views
+        self.session = None
+        self.session_max_age = location_session.MAX_AGE
+        # (view, address, content hash) shown in the results display,
+        # a view with the same content is not rendered again
+        self.rendered = None
+        # 24 hour averages of every reading shown, kept in memory and
+        # saved once when the window closes
+        self.stats = rolling_stats.RollingStats.load()
+        self.stats_changed = False
+
+        master.protocol("WM_DELETE_WINDOW", self.close)
         self.create_widgets()
 
 # ---------------------- GET LOCATION ------------------------------------ #
-    def get_location(self):
+    def get_location(self, display):
         """
         Retrieves the user input for city, state, and country from GUI entries
-            and attempts to geocode the provided location information.
-        Returns:
-            bool: True if the geocoding is successful 
-            and the API request is successful, False otherwise.
+            and geocodes and fetches the location on a worker thread.
+        The last location fetched is reused until the inputs change
+            or it is older than self.session_max_age.
+        A click for a location that is already being fetched joins the
+            request in flight instead of starting a duplicate.
+        Args:
+            display (callable): Called on the Tk main loop with the
+                results once self.address and self.data are set.
         """
         # Get user input for city, state, and country from GUI entries
         city = self.city_entry.get().strip()
@@ -42,132 +107,136 @@ class AQICNGui:
 
         # Check if at least one location field is filled
         if not any([city, state, country]):
-            # If all fields are empty, display an error message and return False
+            # If all fields are empty, display an error message
+            self.clear_results()
             self.results_display.insert(
                 tk.END, "Please enter at least one location field.\n")
-            return False
+            return
 
-        try:
-            # Attempt to geocode the provided location information
-            lat, lng, self.address = geocode_arg(city, state, country)
-
-            # Construct API request URL with latitude, longitude, and API key
-            response = requests.get(
-                AQICN_ENDPOINT + str(lat) + ";" + str(lng)
-                + "/?token=" + api_key.API_KEY
-            )
-
-            # Check if the API request was successful (status code 200)
-            if response.status_code == 200:
-                # If API request successful,
-                # store the JSON response data and return True
-                self.data = response.json()
-                return True
-            else:
-                # If API request failed,
-                # display error message and return False
-                self.results_display.insert(
-                    tk.END, "[-] API unavailable. Please try again.\n")
-                return False
+        key = (city, state, country)
+
+        # Same location as the last fetch and recent enough, reuse it
+        if self.session is not None \
+                and self.session.matches(key, self.session_max_age):
+            self.request_id += 1
+            self.address, self.data = self.session.address, self.session.data
+            display()
+            return
 
+        future = self.in_flight.get(key)
+        if future is None:
+            future = self.executor.submit(
+                fetch_location, city, state, country)
+            self.in_flight[key] = future
+
+        self.request_id += 1
+        # Refreshing the location on screen keeps it until the new
+        # data arrives, it is only redrawn if the content changed
+        if self.session is None or self.session.key != key:
+            self.clear_results()
+            self.results_display.insert(
+                tk.END, "Getting air quality data...\n")
+        self.master.after(
+            POLL_MS, self.poll, key, future, self.request_id, display)
+
+# ---------------------- POLL -------------------------------------------- #
+    def poll(self, key, future, request_id, display):
+        """Check a request from the Tk main loop until it is done"""
+        if not future.done():
+            self.master.after(
+                POLL_MS, self.poll, key, future, request_id, display)
+            return
+
+        if self.in_flight.get(key) is future:
+            del self.in_flight[key]
+
+        # A newer click has replaced this one
+        if request_id != self.request_id:
+            return
+
+        try:
+            self.address, self.data = future.result()
         except Exception as e:
             # If any exception occurs during the process,
-            # display the error message and return False
+            # display the error message
+            self.clear_results()
             self.results_display.insert(tk.END, f"[-] Error: {str(e)}\n")
-            return False
+            return
+
+        self.session = location_session.LocationSession(
+            key, self.address, self.data)
+        display()
 
 # ---------------------- GET CURRENT AQI --------------------------------- #
     def get_current_aqi(self):
         """
         Retrieves the current Air Quality Index (AQI) and displays it.
-        This method clears results display area 
-        Checks if the location is available.
-        If the location is available, it retrieves the AQI and displays it.
+        Requests the location in the background.
+        When the location is available, it retrieves the AQI and displays it.
         """
-        # Clear the results display area
-        self.results_display.delete('1.0', tk.END)
-
-        # Check if the location is available
-        if not self.get_location():
+        # Retrieve the AQI data and display it when the location is ready
+        self.get_location(self.show_current_aqi)
+
+# ---------------------- SHOW CURRENT AQI -------------------------------- #
+    def show_current_aqi(self):
+        """Retrieve the AQI data and display it, unless already shown"""
+        rendered = (
+            "aqi", self.address, forecast_diff.reading_digest(self.data))
+        if rendered == self.rendered:
             return
-
-        # Retrieve the AQI data and display it
+        self.clear_results()
         self.get_aqi()
         self.display_aqi()
+        self.rendered = rendered
 
 # ---------------------- GET AQI FORECAST -------------------------------- #
     def get_aqi_forecast(self):
         """Get the AQI forecast for the given location."""
-        # Clear the results display area
-        self.results_display.delete('1.0', tk.END)
+        # Display the AQI forecast data when the location is ready
+        self.get_location(self.display_aqi_forecast)
 
-        # Check if the location is available
-        if not self.get_location():
+# ---------------------- CLEAR RESULTS ----------------------------------- #
+    def clear_results(self):
+        """Clear the results display area"""
+        self.results_display.delete('1.0', tk.END)
+        self.rendered = None
+
+# ---------------------- CLOSE ------------------------------------------- #
+    def close(self):
+        """Stop the worker threads and close the window"""
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        self.save_stats()
+        self.master.destroy()
+
+# ---------------------- SAVE STATS -------------------------------------- #
+    def save_stats(self):
+        """Write the rolling averages snapshot if a reading was added"""
+        if not self.stats_changed:
             return
-
-        # Retrieve the AQI forecast data and display it
-        self.display_aqi_forecast()
+        try:
+            self.stats.save()
+            self.stats_changed = False
+        except OSError as e:
+            print(f"[-] Could not save {rolling_stats.STATS_SNAPSHOT}: {e}")
 
 # ---------------------- GET AQI ----------------------------------------- #
     def get_aqi(self):
         """
-        Retrieves the Air Quality Index (AQI) data 
-        Updates the instance variables with the relevant information.
+        Parses the Air Quality Index (AQI) reading from the API data
+        into an AirQualityReading for display_aqi.
         """
-        # Extract the AQI data from the JSON response
-        data = self.data.get("data", {})
-        # Extract the sensor location, AQI, and dominant pollutant
-        self.sensor_location = data.get("city", {}).get("name", "N/A")
-        # Extract the AQI value
-        self.aqi = data.get("aqi", "N/A")
-        # Convert the AQI value to a string
-        self.aqi_string = weather_utils.aqi_to_string(self.aqi)
-
-        iaqi = data.get("iaqi", {})
-        self.o3 = iaqi.get("o3", {}).get("v", "NA")
-        self.pm25 = iaqi.get("pm25", {}).get("v", "NA")
-        self.pm10 = iaqi.get("pm10", {}).get("v", "NA")
-        self.co = iaqi.get("co", {}).get("v", "NA")
-        self.so2 = iaqi.get("so2", {}).get("v", "NA")
-        self.no2 = iaqi.get("no2", {}).get("v", "NA")
-
-        self.dom_pol = data.get("dominentpol", "N/A")
-
-        forecast = data.get("forecast", {}).get("daily", {})
-        uvi_data = forecast.get("uvi", [{}])[0]
-        self.uvi = uvi_data.get("avg", "NA")
-        self.uvi_string = weather_utils.uvi_to_string(self.uvi)
-
-        temp = round(iaqi.get("t", {}).get("v", 0), 1)
-        self.temperature = round(((temp * 9.0)/5.0) + 32, 2)
-
-        self.humidity = iaqi.get("h", {}).get("v", "NA")
-
-        wind_speed_kph = iaqi.get("w", {}).get("v", 0)
-        self.wind_speed_mph = round(wind_speed_kph * .0621371, 1)
-
-        pressure = iaqi.get("p", {}).get("v", 0)
-        self.pressure = round(pressure * .02953, 2)
+        self.reading = air_quality.AirQualityReading.from_feed(self.data)
+        # A reading already added, e.g. a reused session, is ignored
+        if self.stats.add(self.reading):
+            self.stats_changed = True
 
 # ---------------------- DISPLAY AQI ------------------------------------- #
     def display_aqi(self):
         """Display AQI results in the results display area."""
-        result = f"\n {self.address}\n"
-        result += f" {'Sensor Location:':<15} {self.sensor_location}\n"
-        result += f"{'-'*70}\n"
-        result += f" {'AQI:':>27} {self.aqi} {self.aqi_string}\n"
-        result += f" {'Dominant Pollutant:':>27} {self.dom_pol}\n"
-        result += f" {'Ozone (O₃):':>27} {self.o3}\n"
-        result += f" {'Fine Particulates (PM25):':>27} {self.pm25}\n"
-        result += f" {'Coarse Particulates (PM10):':>27} {self.pm10}\n"
-        result += f" {'Carbon Monoxide (CO):':>27} {self.co}\n"
-        result += f" {'Sulfur Dioxide (SO₂):':>27} {self.so2}\n"
-        result += f" {'Nitrogen Dioxide (NO₂):':>27} {self.no2}\n"
-        result += f" {'UV Index:':>27} {self.uvi} {self.uvi_string}\n"
-        result += f" {'Temperature:':>27} {self.temperature}°F\n"
-        result += f" {'Humidity:':>27} {self.humidity}%\n"
-        result += f" {'Wind Speed:':>27} {self.wind_speed_mph} mph\n"
-        result += f" {'Pressure:':>27} {self.pressure} inHg\n"
+        station = self.reading.station
+        result = air_quality.format_reading(
+            self.address, self.reading, self.stats.means(station),
+            nowcast.nowcast_stats(self.stats, [station]).get(station))
 
         # Insert the formatted result into the GUI display
         self.results_display.insert(tk.END, result)
@@ -183,52 +252,31 @@ class AQICNGui:
         Retrieves the forecast data from the API response 
         Formats it into a readable string.
         The forecast includes the daily average values for 
-        ozone (o3) and particulate matter (pm25).
+        ozone (o3), particulate matter (pm10, pm25) and UV index.
+        Nothing is redrawn if the same forecast is already shown.
         """
+        rendered = (
+            "forecast", self.address, forecast_diff.forecast_digest(self.data))
+        if rendered == self.rendered:
+            return
+        self.clear_results()
+
         # Get sensor location from the API response
         sensor_location = self.data.get(
             "data", {}).get(
             "city", {}).get("name", "N/A")
 
-        # Get the forecast data from the API response
-        forecast = self.data.get(
-            "data", {}).get(
-            "forecast", {}).get(
-            "daily", {}
-        )
-
-        # Extract o3 (ozone) and pm25 (particulate matter) forecast data
-        o3_slice = forecast.get("o3", [])
-        pm10_slice = forecast.get("pm10", [])
-        pm25_slice = forecast.get("pm25", [])
-        uvi_slice = forecast.get("uvi", [])
-
-        # Initialize the result string with the address
-        result = f"\n {self.address}\n"
-
-        # Extract the sensor location from the API response
-        result += f" {'Sensor Location:':<15} {sensor_location}\n"
-
-        # Add a separator line to the result string
-        result += f"{'-'*70}\n"
-
-        # Add headers for the forecast data to the result string
-        result += f" {'o3':>15} {'pm10':>5} {'pm25':>5} {'uvi':>4}\n"
+        # Columnar forecast aligned on day, NA where a pollutant
+        # has no forecast for that day
+        self.forecast = forecast.Forecast.from_feed(self.data)
 
         # Format the forecast data into a readable string
-        for o3, pm10, pm25, uvi in zip(o3_slice, pm10_slice, pm25_slice, uvi_slice):
-            day = o3.get('day', 'N/A')
-            o3 = o3.get('avg', 'N/A')
-            pm10 = pm10.get('avg', 'N/A')
-            pm25 = pm25.get('avg', 'N/A')
-            uvi = uvi.get('avg', 'N/A')
-
-            # For each day in the forecast, add a line with the
-            # date, o3, pm10, pm25 and uvi average
-            result += f"{day}: {o3:>4} {pm10:> 4} {pm25:>5} {uvi:>4}\n"
+        result = forecast.format_forecast(
+            self.address, sensor_location, self.forecast)
 
         # Insert the formatted result into the GUI display
         self.results_display.insert(tk.END, result)
+        self.rendered = rendered
         self.city_entry.focus()
         self.city_entry.select_range(0, tk.END)
 
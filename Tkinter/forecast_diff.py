@@ -0,0 +1,161 @@
+"""
+    Name: forecast_diff.py
+    Author: William A Loring
+    Created: 10/18/2026
+    Purpose: Detect which forecast days changed between fetches
+    Each day of each pollutant is hashed, repeat polls of a station
+    only pass on the days whose content changed
+"""
+
+import hashlib
+import json
+import threading
+
+# Kinds of ForecastChange
+ADDED = "added"
+CHANGED = "changed"
+
+
+# ---------------------- DIGEST ------------------------------------------ #
+def _digest(value):
+    """Short stable hash of a JSON serializable value"""
+    text = json.dumps(value, sort_keys=True, default=str)
+    return hashlib.blake2b(text.encode(), digest_size=8).hexdigest()
+
+
+# ---------------------- DAY HASHES -------------------------------------- #
+def day_hashes(data):
+    """
+    Hash every forecast entry of a feed response.
+    Returns:
+        dict: {(pollutant, day): (hash, entry)}
+    """
+    daily = (data or {}).get("data", {}).get("forecast", {}).get("daily", {})
+    hashes = {}
+    for pollutant, entries in daily.items():
+        for entry in entries or []:
+            day = entry.get("day")
+            if day is not None:
+                hashes[(pollutant, day)] = (_digest(entry), entry)
+    return hashes
+
+
+# ---------------------- FORECAST DIGEST --------------------------------- #
+def forecast_digest(data):
+    """One hash of the whole forecast, equal when nothing changed"""
+    return _digest(sorted(
+        (pollutant, day, digest)
+        for (pollutant, day), (digest, entry) in day_hashes(data).items()))
+
+
+# ---------------------- READING DIGEST ---------------------------------- #
+def reading_digest(data):
+    """
+    One hash of the current reading, the feed without the forecast
+    and the debug block that changes on every request.
+    """
+    feed = (data or {}).get("data", {})
+    return _digest({key: value for key, value in feed.items()
+                    if key not in ("forecast", "debug")})
+
+
+class ForecastChange:
+    """One forecast day of one pollutant that is new or changed"""
+
+    __slots__ = ("station", "pollutant", "day", "kind", "entry")
+
+    def __init__(self, station, pollutant, day, kind, entry):
+        self.station = station
+        self.pollutant = pollutant
+        self.day = day
+        self.kind = kind
+        # Raw daily entry: {"avg", "day", "max", "min"}
+        self.entry = entry
+
+    def as_dict(self):
+        return {
+            "station": self.station,
+            "pollutant": self.pollutant,
+            "day": self.day,
+            "change": self.kind,
+            "avg": self.entry.get("avg"),
+            "min": self.entry.get("min"),
+            "max": self.entry.get("max"),
+        }
+
+
+class ForecastTracker:
+    """
+    Last forecast hashes of every station. update() returns the
+    changed days and passes them to every subscriber.
+    """
+
+    def __init__(self):
+        # station: {(pollutant, day): hash}
+        self._hashes = {}
+        self._subscribers = []
+        self._lock = threading.Lock()
+
+# ---------------------- SUBSCRIBE --------------------------------------- #
+    def subscribe(self, callback):
+        """
+        Call callback(changes) with the list of ForecastChange of every
+        update that changed something.
+        Returns:
+            callable: Call it to unsubscribe.
+        """
+        with self._lock:
+            self._subscribers.append(callback)
+
+        def unsubscribe():
+            with self._lock:
+                if callback in self._subscribers:
+                    self._subscribers.remove(callback)
+        return unsubscribe
+
+# ---------------------- UPDATE ------------------------------------------ #
+    def update(self, data):
+        """
+        Compare the forecast of a feed response with the last one seen
+        for its station. Days that left the forecast window are dropped
+        silently, they are history, not changes.
+        Returns:
+            list: ForecastChange of every new or changed day.
+        """
+        if not data or data.get("status") != "ok":
+            return []
+        station = data.get("data", {}).get("idx")
+        current = day_hashes(data)
+
+        with self._lock:
+            previous = self._hashes.get(station, {})
+            self._hashes[station] = {
+                key: digest for key, (digest, entry) in current.items()}
+            subscribers = list(self._subscribers)
+
+        changes = []
+        for (pollutant, day), (digest, entry) in sorted(current.items()):
+            before = previous.get((pollutant, day))
+            if before != digest:
+                changes.append(ForecastChange(
+                    station, pollutant, day,
+                    ADDED if before is None else CHANGED, entry))
+
+        if changes:
+            for callback in subscribers:
+                try:
+                    callback(changes)
+                except Exception as e:
+                    # One broken consumer must not stop the others
+                    print(f"[-] Forecast subscriber failed: {e}")
+        return changes
+
+# ---------------------- FORGET ------------------------------------------ #
+    def forget(self, station):
+        """Drop a station, its next update reports every day as added"""
+        with self._lock:
+            self._hashes.pop(station, None)
+
+
+# Shared tracker fed by the readings store
+FORECAST_CHANGES = ForecastTracker()
@@ -0,0 +1,226 @@
+"""
+    Name: geocode_service.py
+    Author: William A Loring
+    Created: 10/18/2026
+    Purpose: Shared, rate limited gateway to Nominatim
+    One geolocator and one worker thread serve every caller, so the
+    whole app stays under the Nominatim usage policy of 1 request/s
+"""
+
+import heapq
+import itertools
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+# pip install geopy
+from geopy.geocoders import Nominatim
+# pip install numpy
+import numpy as np
+
+USER_AGENT = "location_practice"
+
+# Nominatim usage policy: an absolute maximum of 1 request per second
+DEFAULT_RATE = 1.0
+
+# Priority lanes, lower runs first
+INTERACTIVE = 0
+BATCH = 1
+LANES = {INTERACTIVE: "interactive", BATCH: "batch"}
+
+# Wait time samples kept per lane for percentiles
+WAIT_SAMPLES = 1000
+
+
+class TokenBucket:
+    """Blocking token bucket, rate tokens per second up to burst"""
+
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+# ---------------------- ACQUIRE ----------------------------------------- #
+    def acquire(self):
+        """Wait for a token and take it"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(
+                    self.burst,
+                    self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class _Request:
+    """One queued call and the callers waiting on it"""
+
+    __slots__ = ("call", "priority", "enqueued", "future", "started")
+
+    def __init__(self, call, priority):
+        self.call = call
+        self.priority = priority
+        self.enqueued = time.monotonic()
+        self.future = Future()
+        self.started = False
+
+
+class GeocodeService:
+    """
+    Queue of geocoding calls run one at a time at a fixed rate.
+    Requests for a key already queued or running share its result,
+    an interactive duplicate promotes a queued batch request.
+    """
+
+    def __init__(self, rate=DEFAULT_RATE, user_agent=USER_AGENT):
+        self.rate = rate
+        self.geolocator = Nominatim(user_agent=user_agent)
+        self._bucket = TokenBucket(rate)
+        # (priority, sequence, key), stale entries are skipped
+        self._heap = []
+        self._sequence = itertools.count()
+        # key: _Request queued or running
+        self._pending = {}
+        self._condition = threading.Condition()
+        self._worker = None
+
+        self.submitted = 0
+        self.merged = 0
+        self.completed = 0
+        self.failed = 0
+        self._waits = {lane: deque(maxlen=WAIT_SAMPLES) for lane in LANES}
+
+# ---------------------- SUBMIT ------------------------------------------ #
+    def submit(self, key, call, priority=INTERACTIVE):
+        """
+        Queue call(geolocator) unless key is already queued or running.
+        Args:
+            key (hashable): Identifies duplicate requests.
+            call (callable): Called with the shared geolocator.
+            priority (int): INTERACTIVE or BATCH.
+        Returns:
+            Future: Resolves to the result of call.
+        """
+        with self._condition:
+            self.submitted += 1
+            request = self._pending.get(key)
+            if request is not None:
+                self.merged += 1
+                if priority < request.priority and not request.started:
+                    request.priority = priority
+                    heapq.heappush(
+                        self._heap, (priority, next(self._sequence), key))
+                    self._condition.notify()
+                return request.future
+
+            request = self._pending[key] = _Request(call, priority)
+            heapq.heappush(self._heap, (priority, next(self._sequence), key))
+            if self._worker is None:
+                self._worker = threading.Thread(
+                    target=self._run, name="geocode-service", daemon=True)
+                self._worker.start()
+            self._condition.notify()
+            return request.future
+
+# ---------------------- GEOCODE ----------------------------------------- #
+    def geocode(self, query, priority=INTERACTIVE, timeout=None):
+        """Rate limited Nominatim geocode, blocks until it has run"""
+        if isinstance(query, dict):
+            key = ("geocode",) + tuple(sorted(query.items()))
+        else:
+            key = ("geocode", query)
+        return self.submit(
+            key, lambda geolocator: geolocator.geocode(query),
+            priority).result(timeout)
+
+# ---------------------- REVERSE ----------------------------------------- #
+    def reverse(self, point, zoom=10, priority=INTERACTIVE, timeout=None):
+        """Rate limited Nominatim reverse, blocks until it has run"""
+        key = ("reverse", tuple(point), zoom)
+        return self.submit(
+            key, lambda geolocator: geolocator.reverse(point, zoom=zoom),
+            priority).result(timeout)
+
+# ---------------------- NEXT -------------------------------------------- #
+    def _next(self):
+        """Pop the highest priority request still waiting, or None"""
+        while self._heap:
+            priority, _, key = heapq.heappop(self._heap)
+            request = self._pending.get(key)
+            # Skip entries left behind by a promotion
+            if request is not None and not request.started \
+                    and request.priority == priority:
+                return key, request
+        return None
+
+# ---------------------- RUN --------------------------------------------- #
+    def _run(self):
+        """Worker thread, one call per token"""
+        while True:
+            with self._condition:
+                while not self._heap:
+                    self._condition.wait()
+            # Pick the request after the token, so an interactive
+            # request queued during the wait still goes first
+            self._bucket.acquire()
+            with self._condition:
+                chosen = self._next()
+                if chosen is None:
+                    continue
+                key, request = chosen
+                request.started = True
+                self._waits[request.priority].append(
+                    time.monotonic() - request.enqueued)
+
+            try:
+                result = request.call(self.geolocator)
+            except BaseException as e:
+                with self._condition:
+                    self.failed += 1
+                    del self._pending[key]
+                request.future.set_exception(e)
+            else:
+                with self._condition:
+                    self.completed += 1
+                    del self._pending[key]
+                request.future.set_result(result)
+
+# ---------------------- METRICS ----------------------------------------- #
+    def metrics(self):
+        """Return queue depth and wait time metrics as a dictionary"""
+        with self._condition:
+            depth = {name: 0 for name in LANES.values()}
+            for request in self._pending.values():
+                if not request.started:
+                    depth[LANES[request.priority]] += 1
+            waits = {LANES[lane]: list(samples)
+                     for lane, samples in self._waits.items()}
+            counts = {
+                "submitted": self.submitted,
+                "merged": self.merged,
+                "completed": self.completed,
+                "failed": self.failed,
+            }
+
+        wait_ms = {}
+        for lane, samples in waits.items():
+            if samples:
+                p50, p95, top = np.percentile(samples, [50, 95, 100]) * 1000
+                wait_ms[lane] = {
+                    "p50_ms": round(p50, 1),
+                    "p95_ms": round(p95, 1),
+                    "max_ms": round(top, 1),
+                }
+        counts.update({"queue_depth": depth, "wait": wait_ms})
+        return counts
+
+
+# Shared service used by the CLI, Tkinter and PySide6 front ends
+SERVICE = GeocodeService()
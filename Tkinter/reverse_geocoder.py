@@ -0,0 +1,172 @@
+"""
+    Name: reverse_geocoder.py
+    Author: William A Loring
+    Created: 10/18/2026
+    Purpose: Offline reverse geocoding to the nearest populated place
+    Uses the places of the gazetteer index, build it first with
+    gazetteer.py
+"""
+
+import threading
+# pip install numpy
+import numpy as np
+import gazetteer
+import spatial_index
+
+# Places are bucketed in cells of this many degrees, a query looks at
+# its own cell and the 8 around it
+DEFAULT_CELL_DEGREES = 1.0
+
+# Queries whose nearest place could be further out look at wider rings
+# of cells, up to this many cells from their own
+MAX_RINGS = 3
+
+# A place further than this is no useful label for a point, lookup()
+# returns None so callers fall back to an online reverse geocoder
+DEFAULT_MAX_KM = 25.0
+
+
+class ReverseGeocoder:
+    """
+    Places sorted by grid cell, so the places of any cell are one
+    contiguous slice found with searchsorted. A batch of queries
+    gathers the slices of every query's neighboring cells, measures
+    all candidate distances at once, and keeps the nearest per query.
+    Queries whose nearest place is further than the searched cells
+    are guaranteed to cover are searched again with a wider ring.
+    """
+
+    def __init__(self, index_path=gazetteer.GAZETTEER_INDEX,
+                 cell_degrees=DEFAULT_CELL_DEGREES):
+        self.index_path = index_path
+        self.cell_degrees = cell_degrees
+        self._lng_cells = max(1, round(360 / cell_degrees))
+        self._loaded = False
+        self._lock = threading.Lock()
+        self.lat = self.lng = self.cells = None
+        self.names = None
+
+    @property
+    def available(self):
+        """True if the gazetteer index has places"""
+        self._load()
+        return self.lat is not None and len(self.lat) > 0
+
+# ---------------------- LOAD -------------------------------------------- #
+    def _load(self):
+        """Read the places from the gazetteer index on first use"""
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            index = gazetteer.Gazetteer(self.index_path)
+            places = list(index.places())
+            index.close()
+            if places:
+                lat, lng, names = zip(*places)
+                lat = np.array(lat, dtype=float)
+                lng = np.array(lng, dtype=float)
+                cells = self._cell_ids(lat, lng)
+                order = np.argsort(cells, kind="stable")
+                self.lat, self.lng = lat[order], lng[order]
+                self.cells = cells[order]
+                self.names = np.array(names, dtype=object)[order]
+            self._loaded = True
+
+# ---------------------- CELL IDS ---------------------------------------- #
+    def _cell_ids(self, lat, lng, lat_offset=0, lng_offset=0):
+        """Grid cell number of each point, shifted by whole cells"""
+        lat_cell = np.floor(lat / self.cell_degrees).astype(np.int64)
+        lng_cell = np.floor(lng / self.cell_degrees).astype(np.int64)
+        lng_cell = (lng_cell + lng_offset) % self._lng_cells
+        return (lat_cell + lat_offset) * self._lng_cells + lng_cell
+
+# ---------------------- BATCH ------------------------------------------- #
+    def batch(self, lats, lngs):
+        """
+        Nearest place to every latitude, longitude in one vectorized pass.
+        Args:
+            lats (array): Latitudes.
+            lngs (array): Longitudes.
+        Returns:
+            tuple: (names, distances) arrays, the name is None and the
+            distance NaN where no place is within MAX_RINGS cells.
+        """
+        lats = np.atleast_1d(np.asarray(lats, dtype=float))
+        lngs = np.atleast_1d(np.asarray(lngs, dtype=float))
+        names = np.full(len(lats), None, dtype=object)
+        distances = np.full(len(lats), np.nan)
+        if not self.available or len(lats) == 0:
+            return names, distances
+
+        pending = np.arange(len(lats))
+        for ring in range(1, MAX_RINGS + 1):
+            found, distance = self._nearest(lats[pending], lngs[pending], ring)
+            names[pending] = found
+            distances[pending] = distance
+
+            # Distance every place outside the searched cells is beyond,
+            # cells narrow towards the poles
+            poleward = np.minimum(
+                np.abs(lats[pending]) + ring * self.cell_degrees, 89.9)
+            covered = (ring * self.cell_degrees * spatial_index.KM_PER_DEGREE
+                       * np.cos(np.radians(poleward)))
+            pending = pending[~(distance <= covered)]
+            if len(pending) == 0:
+                break
+        return names, distances
+
+# ---------------------- NEAREST ----------------------------------------- #
+    def _nearest(self, lats, lngs, ring):
+        """Nearest place to each query within ring cells of its own"""
+        names = np.full(len(lats), None, dtype=object)
+        distances = np.full(len(lats), np.nan)
+
+        # Slice of the sorted places in each neighboring cell of a query
+        offsets = range(-ring, ring + 1)
+        queries, starts, ends = [], [], []
+        for lat_offset in offsets:
+            for lng_offset in offsets:
+                cells = self._cell_ids(lats, lngs, lat_offset, lng_offset)
+                starts.append(np.searchsorted(self.cells, cells, "left"))
+                ends.append(np.searchsorted(self.cells, cells, "right"))
+                queries.append(np.arange(len(lats)))
+        queries = np.concatenate(queries)
+        starts = np.concatenate(starts)
+        counts = np.concatenate(ends) - starts
+
+        # Flatten the ragged slices into one candidate list
+        total = int(counts.sum())
+        if total == 0:
+            return names, distances
+        query = np.repeat(queries, counts)
+        first = np.cumsum(counts) - counts
+        place = np.repeat(starts - first, counts) + np.arange(total)
+
+        distance = spatial_index.haversine_km(
+            lats[query], lngs[query], self.lat[place], self.lng[place])
+
+        # Nearest candidate of each query: sort by query then distance
+        order = np.lexsort((distance, query))
+        query, place, distance = query[order], place[order], distance[order]
+        nearest = np.ones(len(query), dtype=bool)
+        nearest[1:] = query[1:] != query[:-1]
+        names[query[nearest]] = self.names[place[nearest]]
+        distances[query[nearest]] = distance[nearest]
+        return names, distances
+
+# ---------------------- LOOKUP ------------------------------------------ #
+    def lookup(self, lat, lng, max_km=DEFAULT_MAX_KM):
+        """
+        Return (address, distance km) of the nearest place, or None
+        if there is no place within max_km.
+        """
+        names, distances = self.batch([lat], [lng])
+        if names[0] is None or not distances[0] <= max_km:
+            return None
+        return names[0], float(distances[0])
+
+
+# Shared reverse geocoder, lookups return None until an index is built
+REVERSE_GEOCODER = ReverseGeocoder()